@@ -0,0 +1,305 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+
+import glue_metadata_config
+from glue_metadata_output import NdjsonWriter, is_ndjson_output
+from glue_metadata_rate_limiter import rate_limiter
+from glue_metadata_crawler import (get_aws_token, catalog_id_kwargs, classify_columns,
+                                   write_metadata_and_missing_values, write_catalog_outputs, load_new_values,
+                                   make_table_filter, TableContext, prepare_column_comment_update, versioned_update_kwargs)
+
+# aiobotocore is only needed by the asyncio backend, the sync crawler works without it
+try:
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import AioSession
+except ImportError:
+    AioConfig = None
+    AioSession = None
+
+
+# The crawl modes of the asyncio backend, the other modes only run on the sync crawler
+ASYNC_CRAWL_MODES = ('table', 'catalog')
+
+
+# Creates one semaphore per service, limiting the number of requests in flight to each service
+def create_service_limits(glue_max_concurrency=None, s3_max_concurrency=None):
+    return {
+        'glue': asyncio.Semaphore(glue_max_concurrency or glue_metadata_config.GLUE_MAX_CONCURRENCY),
+        's3': asyncio.Semaphore(s3_max_concurrency or glue_metadata_config.S3_MAX_CONCURRENCY)
+    }
+
+
+# Creates an async AWS client for the service and registers it on the exit stack, which closes it
+async def login_to_aws_async(exit_stack, service_name):
+    if AioSession is None:
+        raise ImportError("aiobotocore is required for the asyncio crawler backend")
+    try:
+        max_concurrency = {
+            'glue': glue_metadata_config.GLUE_MAX_CONCURRENCY,
+            's3': glue_metadata_config.S3_MAX_CONCURRENCY
+        }[service_name]
+        client = AioSession(profile=glue_metadata_config.PROFILE_NAME or None).create_client(
+            service_name,
+            region_name=glue_metadata_config.REGION_NAME or None,
+            config=AioConfig(max_pool_connections=max_concurrency)
+        )
+        client = await exit_stack.enter_async_context(client)
+        if glue_metadata_config.RATE_LIMIT_ENABLED:
+            rate_limiter.attach_async(client)
+        return client
+    except Exception as e:
+        raise ConnectionError(f"Error connecting to AWS {service_name} : ", str(e))
+
+
+async def call_limited(client, limits, operation_name, **kwargs):
+    """
+    Call an AWS API operation while holding the concurrency limit of the client's service.
+
+    Parameters:
+        client: aiobotocore client.
+        limits (dict): The semaphores created by create_service_limits, keyed by service name.
+        operation_name (str): The client method to call, for example 'get_table'.
+        **kwargs: The parameters of the operation.
+
+    Returns:
+        dict: The response of the operation.
+    """
+    async with limits[client.meta.service_model.service_name]:
+        return await getattr(client, operation_name)(**kwargs)
+
+
+async def paginate_limited(client, limits, operation_name, result_key, **kwargs):
+    """
+    Yield every item of a paginated operation, holding the concurrency limit for each page request only.
+
+    Parameters:
+        client: aiobotocore client.
+        limits (dict): The semaphores created by create_service_limits, keyed by service name.
+        operation_name (str): The client method to call, for example 'get_tables'.
+        result_key (str): The response key holding the items of a page, for example 'TableList'.
+        **kwargs: The parameters of the operation.
+
+    Returns:
+        async generator: The items of every page.
+    """
+    while True:
+        response = await call_limited(client, limits, operation_name, **kwargs)
+        for item in response[result_key]:
+            yield item
+        if not response.get('NextToken'):
+            return
+        kwargs['NextToken'] = response['NextToken']
+
+
+async def get_table_metadata_async(glue_client, limits, database_name, table_name, catalog_id=None):
+    """
+    Retrieves all metadata associated with a table in AWS Glue Data Catalog, the async variant of get_table_metadata.
+
+    Parameters:
+        glue_client: aiobotocore Glue client.
+        limits (dict): The semaphores created by create_service_limits, keyed by service name.
+        database_name (str): The name of the database where the table resides.
+        table_name (str): The name of the table for which to retrieve metadata.
+        catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+
+    Returns:
+        dict: A dictionary containing all table metadata.
+    """
+    try:
+        response = await call_limited(glue_client, limits, 'get_table', DatabaseName=database_name,
+                                      Name=table_name, **catalog_id_kwargs(catalog_id))
+
+        # Extract all metadata
+        metadata = response['Table']
+
+        # Check for missing values
+        missing_values = [key for key, value in metadata.items() if value is None]
+
+        # Write metadata and missing values to a single file
+        write_metadata_and_missing_values(metadata, missing_values)
+
+        return metadata
+
+    except glue_client.exceptions.EntityNotFoundException:
+        print(f"***** Table '{table_name}' not found in the database '{database_name}'.")
+        return None
+    except Exception as e:
+        print(f"Error occurred: {e}")
+        return None
+
+
+async def add_update_and_inherit_properties_async(glue_client, limits, database_name, table_name, metadata,
+                                                  new_values=None, table_context=None):
+    """
+    Add or update missing column comments in AWS Glue table's metadata, the async variant of
+    add_update_and_inherit_properties. Concurrent modifications are retried the same way.
+
+    Parameters:
+        glue_client: aiobotocore Glue client.
+        limits (dict): The semaphores created by create_service_limits, keyed by service name.
+        database_name (str): The name of the database where the table resides.
+        table_name (str): The name of the table for which to update missing values.
+        metadata (dict): A dictionary containing the metadata.
+        new_values (dict, optional): The new column comments, loaded from 'new_values.json' when not given.
+        table_context (TableContext, optional): The already fetched table. The table is fetched again only when
+            it is not given or stale.
+
+    Returns:
+        dict: A dictionary containing the updated missing columns and inherited properties.
+    """
+    catalog_id = table_context.catalog_id if table_context else None
+    for attempt in range(glue_metadata_config.MAX_UPDATE_RETRIES + 1):
+        # Fetch the existing table metadata, unless it was already fetched
+        if table_context is None or table_context.is_stale(metadata):
+            response = await call_limited(glue_client, limits, 'get_table', DatabaseName=database_name,
+                                          Name=table_name, **catalog_id_kwargs(catalog_id))
+            if table_context is None:
+                table_context = TableContext(database_name, table_name, response['Table'])
+            else:
+                table_context.set_table(response['Table'])
+        if metadata is None:
+            # Merge again from the table fetched after the concurrent modification
+            metadata = table_context.table
+
+        table_input, result = prepare_column_comment_update(table_context, metadata, new_values)
+        if table_input is None:
+            return result
+
+        # Update the table in Glue Data Catalog with the new column values
+        try:
+            await call_limited(glue_client, limits, 'update_table', **versioned_update_kwargs(table_context,
+                                                                                              table_input))
+        except glue_client.exceptions.ConcurrentModificationException:
+            if attempt == glue_metadata_config.MAX_UPDATE_RETRIES:
+                raise
+            table_context.stale = True
+            metadata = None
+            continue
+
+        print("****** Missing column values and other properties updated successfully! ******")
+        return result
+
+
+async def crawl_catalog_metadata_async(glue_client, limits, catalog_id=None, database_names=None,
+                                       output_file="catalog_metadata.json", update_tables=False, new_values=None,
+                                       report_file="update_report.json", table_filter=None):
+    """
+    Crawl every table of the given databases concurrently, the async variant of crawl_catalog_metadata. NDJSON
+    output files get one record per table streamed to them, like crawl_catalog_metadata.
+
+    Parameters:
+        glue_client: aiobotocore Glue client.
+        limits (dict): The semaphores created by create_service_limits, keyed by service name.
+        catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+        database_names (list, optional): The databases to crawl. Default is every database in the catalog.
+        output_file (str, optional): The name of the output JSON file. Default is "catalog_metadata.json".
+        update_tables (bool, optional): Add or update the missing column comments of every crawled table.
+        new_values (dict, optional): The new column comments, loaded from 'new_values.json' when not given.
+        report_file (str, optional): The name of the JSON file with the changed and unchanged column counts of
+            every updated table. Default is "update_report.json".
+        table_filter (function, optional): Only crawl the tables selected by the filter, see make_table_filter.
+
+    Returns:
+        dict: Default values and missing columns keyed by database name and table name, empty when streamed.
+    """
+    if update_tables and new_values is None:
+        new_values = load_new_values()
+    writer = NdjsonWriter(output_file) if is_ndjson_output(output_file) else None
+
+    if not database_names:
+        database_names = [database['Name'] async for database in paginate_limited(
+            glue_client, limits, 'get_databases', 'DatabaseList', **catalog_id_kwargs(catalog_id))]
+
+    async def crawl_database(database_name):
+        database_metadata = {}
+        database_report = {}
+        table_contexts = []
+        updates = []
+        try:
+            async for table in paginate_limited(glue_client, limits, 'get_tables', 'TableList',
+                                                DatabaseName=database_name, **catalog_id_kwargs(catalog_id)):
+                if table_filter is not None and not table_filter(table):
+                    continue
+                analysis = classify_columns(table).as_dict()
+                if writer is not None:
+                    writer.write({'database': database_name, 'table': table['Name'], **analysis})
+                else:
+                    database_metadata[table['Name']] = analysis
+                if update_tables:
+                    table_context = TableContext(database_name, table['Name'], table, catalog_id)
+                    table_contexts.append(table_context)
+                    updates.append(asyncio.create_task(add_update_and_inherit_properties_async(
+                        glue_client, limits, database_name, table['Name'], table, new_values, table_context)))
+        except glue_client.exceptions.EntityNotFoundException:
+            print(f"***** Database '{database_name}' not found in the catalog.")
+
+        for table_context, result in zip(table_contexts, await asyncio.gather(*updates, return_exceptions=True)):
+            if isinstance(result, Exception):
+                print(f" ***** Error updating table '{database_name}.{table_context.table_name}': {result}")
+            if table_context.update_report is not None:
+                database_report[table_context.table_name] = table_context.update_report
+        return database_metadata, database_report
+
+    try:
+        results = await asyncio.gather(*(crawl_database(database_name) for database_name in database_names))
+    finally:
+        if writer is not None:
+            writer.close()
+    # Databases without crawled tables are left out, as in crawl_catalog_metadata
+    catalog_metadata = {} if writer else {database_name: result[0]
+                                          for database_name, result in zip(database_names, results) if result[0]}
+    update_report = {database_name: result[1] for database_name, result in zip(database_names, results) if result[1]}
+
+    write_catalog_outputs(None if writer else catalog_metadata, update_report if update_tables else None,
+                          output_file, report_file)
+
+    return catalog_metadata
+
+
+async def main_async():
+    # An unsupported mode must not fall through to the single-table path, which updates TABLE_NAME
+    if glue_metadata_config.CRAWL_MODE not in ASYNC_CRAWL_MODES:
+        raise ValueError(f"CRAWL_MODE '{glue_metadata_config.CRAWL_MODE}' is not supported by the asyncio backend, "
+                         f"expected one of {list(ASYNC_CRAWL_MODES)}, use glue_metadata_crawler.py instead")
+
+    try:
+        access_key, secret_key, region_name, bucket_name, database_name, catalog_id, object_name, table_name = get_aws_token()
+
+        async with AsyncExitStack() as exit_stack:
+            limits = create_service_limits()
+
+            # Login to AWS S3 and AWS Glue
+            s3_client = await login_to_aws_async(exit_stack, 's3')
+            glue_client = await login_to_aws_async(exit_stack, 'glue')
+
+            # Crawl every table of the configured databases instead of a single table
+            if glue_metadata_config.CRAWL_MODE == 'catalog':
+                await crawl_catalog_metadata_async(glue_client, limits, catalog_id,
+                                                   glue_metadata_config.CRAWL_DATABASES,
+                                                   output_file=glue_metadata_config.CATALOG_OUTPUT_FILE,
+                                                   update_tables=glue_metadata_config.CATALOG_UPDATE,
+                                                   report_file=glue_metadata_config.CATALOG_UPDATE_REPORT_FILE,
+                                                   table_filter=make_table_filter(
+                                                       glue_metadata_config.CRAWL_TABLE_NAME_PATTERN,
+                                                       glue_metadata_config.CRAWL_TABLE_TYPES))
+                return
+
+            # Get table metadata
+            default_table_metadata = await get_table_metadata_async(glue_client, limits, database_name, table_name,
+                                                                    catalog_id)
+
+            table_context = TableContext(database_name, table_name, default_table_metadata, catalog_id)
+            update_table_metadata = await add_update_and_inherit_properties_async(glue_client, limits, database_name,
+                                                                                  table_name, default_table_metadata,
+                                                                                  table_context=table_context)
+
+            write_metadata_and_missing_values(update_table_metadata, update_table_metadata.get('missing_columns', {}),
+                                              output_file="updated_metadata.json")
+
+    except Exception as e:
+        logging.exception("An error occurred: %s", str(e))
+
+
+if __name__ == "__main__":
+    asyncio.run(main_async())
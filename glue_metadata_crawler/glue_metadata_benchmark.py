@@ -0,0 +1,366 @@
+import asyncio
+import copy
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import boto3
+from botocore.config import Config
+
+from glue_metadata_crawler import (crawl_catalog_metadata, get_missing_column_comments, apply_new_column_comments,
+                                   classify_columns)
+from glue_metadata_async import AioConfig, AioSession, create_service_limits, crawl_catalog_metadata_async
+from glue_metadata_cache import TableCache
+from glue_metadata_model import DescriptorPool, Table
+from glue_metadata_output import SERIALIZERS, SERIALIZER_MODULES, serialize_datetime
+
+# moto is only needed to run the benchmarks against a local AWS server
+try:
+    from moto.server import ThreadedMotoServer
+except ImportError:
+    ThreadedMotoServer = None
+
+BENCHMARK_CREDENTIALS = {
+    'region_name': 'us-east-1',
+    'aws_access_key_id': 'testing',
+    'aws_secret_access_key': 'testing'
+}
+
+
+# Times a callable and returns its result with the elapsed seconds
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+# Creates databases and tables with a mix of commented and uncommented columns on the Glue endpoint
+def seed_glue_catalog(glue_client, database_count, table_count, column_count):
+    # A database without tables, both crawls must leave it out of their outputs
+    glue_client.create_database(DatabaseInput={'Name': 'benchmark_db_empty'})
+    for database_index in range(database_count):
+        database_name = f'benchmark_db_{database_index}'
+        glue_client.create_database(DatabaseInput={'Name': database_name})
+        for table_index in range(table_count):
+            glue_client.create_table(DatabaseName=database_name, TableInput={
+                'Name': f'benchmark_table_{table_index}',
+                'TableType': 'EXTERNAL_TABLE',
+                'StorageDescriptor': {
+                    'Columns': [
+                        {'Name': f'column_{i}', 'Type': 'string', 'Comment': f'comment {i}' if i % 2 else ''}
+                        for i in range(column_count)
+                    ],
+                    'Location': f's3://benchmark-bucket/{database_name}/benchmark_table_{table_index}/'
+                }
+            })
+
+
+def benchmark_crawl_backends(database_count=10, table_count=200, column_count=20, max_workers=16):
+    """
+    Compare the thread-pool and asyncio catalog crawls against a local moto server.
+
+    Parameters:
+        database_count (int, optional): The number of databases to create.
+        table_count (int, optional): The number of tables per database.
+        column_count (int, optional): The number of columns per table.
+        max_workers (int, optional): The worker threads of the thread-pool crawl and in-flight requests of the
+            asyncio crawl.
+
+    Returns:
+        dict: The elapsed seconds of each backend.
+    """
+    if ThreadedMotoServer is None or AioSession is None:
+        raise ImportError("moto[server] and aiobotocore are required for the crawl backend benchmark")
+
+    server = ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    endpoint_url = f'http://{host}:{port}'
+    try:
+        glue_client = boto3.client('glue', endpoint_url=endpoint_url,
+                                   config=Config(max_pool_connections=max_workers), **BENCHMARK_CREDENTIALS)
+        seed_glue_catalog(glue_client, database_count, table_count, column_count)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            thread_pool_output, thread_pool_seconds = timed(
+                crawl_catalog_metadata, glue_client, output_file=os.path.join(output_dir, 'thread_pool.json'),
+                max_workers=max_workers)
+
+            async def crawl_async():
+                async with AioSession().create_client('glue', endpoint_url=endpoint_url,
+                                                      config=AioConfig(max_pool_connections=max_workers),
+                                                      **BENCHMARK_CREDENTIALS) as async_glue_client:
+                    return await crawl_catalog_metadata_async(async_glue_client, create_service_limits(max_workers),
+                                                              output_file=os.path.join(output_dir, 'async.json'))
+
+            asyncio_output, asyncio_seconds = timed(asyncio.run, crawl_async())
+
+        if thread_pool_output != asyncio_output:
+            raise AssertionError("The thread-pool and asyncio crawls produced different outputs")
+
+        tables = database_count * table_count
+        print(f"Catalog crawl of {tables} tables: thread pool {thread_pool_seconds:.2f}s, "
+              f"asyncio {asyncio_seconds:.2f}s")
+        return {'thread_pool': thread_pool_seconds, 'asyncio': asyncio_seconds}
+    finally:
+        server.stop()
+
+
+# Builds a table with the given number of columns, every other column without a comment
+def build_wide_table(column_count):
+    return {
+        'Name': 'wide_table',
+        'StorageDescriptor': {
+            'Columns': [
+                {'Name': f'column_{i}', 'Type': 'string', 'Comment': f'comment {i}' if i % 2 else ''}
+                for i in range(column_count)
+            ]
+        }
+    }
+
+
+# The nested-loop column merge that add_update_and_inherit_properties used before the name-keyed indexes
+def nested_loop_column_merge(metadata, existing_metadata, new_values):
+    missing_columns = {}
+    for col in metadata['StorageDescriptor']['Columns']:
+        if col.get('Comment', '') == '':
+            for existing_col in existing_metadata['StorageDescriptor']['Columns']:
+                if existing_col['Name'] == col['Name']:
+                    missing_columns[col['Name']] = existing_col.get('Comment', '')
+                    break
+    for column, new_comment in missing_columns.items():
+        if column in new_values:
+            new_comment = new_values[column]
+        for col in metadata['StorageDescriptor']['Columns']:
+            if col['Name'] == column:
+                col['Comment'] = new_comment
+    return missing_columns
+
+
+# The indexed column merge of add_update_and_inherit_properties
+def indexed_column_merge(metadata, existing_metadata, new_values):
+    missing_columns = get_missing_column_comments(metadata, existing_metadata)
+    apply_new_column_comments(metadata, missing_columns, new_values)
+    return missing_columns
+
+
+def benchmark_column_merge(column_count=10000):
+    """
+    Compare the nested-loop and indexed column merge of add_update_and_inherit_properties on a wide table.
+
+    Parameters:
+        column_count (int, optional): The number of columns of the table.
+
+    Returns:
+        dict: The elapsed seconds of each merge.
+    """
+    table = build_wide_table(column_count)
+    new_values = {f'column_{i}': f'new comment {i}' for i in range(0, column_count, 4)}
+
+    nested_loop_metadata = copy.deepcopy(table)
+    nested_loop_result, nested_loop_seconds = timed(nested_loop_column_merge, nested_loop_metadata, table, new_values)
+    indexed_metadata = copy.deepcopy(table)
+    indexed_result, indexed_seconds = timed(indexed_column_merge, indexed_metadata, table, new_values)
+
+    if nested_loop_result != indexed_result or nested_loop_metadata != indexed_metadata:
+        raise AssertionError("The nested-loop and indexed column merges produced different columns")
+
+    print(f"Column merge of {column_count} columns: nested loop {nested_loop_seconds:.3f}s, "
+          f"indexed {indexed_seconds:.3f}s")
+    return {'nested_loop': nested_loop_seconds, 'indexed': indexed_seconds}
+
+
+# The two-pass column classification that write_metadata_and_missing_values used before classify_columns
+def two_pass_column_classification(metadata, missing_values):
+    default_values = {}
+    missing_columns = {}
+    for column in metadata.get('StorageDescriptor', {}).get('Columns', []):
+        name = column.get('Name')
+        comment = column.get('Comment')
+        if comment is not None and comment.strip() != "":
+            default_values[name] = comment
+        if name in missing_values and (comment is None or comment.strip() == ""):
+            missing_columns[name] = None
+    for column in metadata.get('StorageDescriptor', {}).get('Columns', []):
+        name = column.get('Name')
+        comment = column.get('Comment')
+        if name not in missing_columns and (comment is None or comment.strip() == ""):
+            missing_columns[name] = None
+    return {"default_values": default_values, "missing_columns": missing_columns}
+
+
+def benchmark_column_classification(column_count=10000):
+    """
+    Compare the two-pass column classification with classify_columns on a wide table.
+
+    Parameters:
+        column_count (int, optional): The number of columns of the table, every fourth one is flagged as missing.
+
+    Returns:
+        dict: The elapsed seconds of each classification.
+    """
+    table = build_wide_table(column_count)
+    missing_values = [f'column_{i}' for i in range(0, column_count, 4)]
+
+    two_pass_result, two_pass_seconds = timed(two_pass_column_classification, table, missing_values)
+    single_pass_result, single_pass_seconds = timed(classify_columns, table, missing_values)
+
+    # Compare the key order too, the flagged missing columns come first
+    if (list(two_pass_result['missing_columns']) != list(single_pass_result.missing_columns)
+            or two_pass_result != single_pass_result.as_dict()):
+        raise AssertionError("The two-pass and single-pass classifications produced different columns")
+
+    print(f"Column classification of {column_count} columns: two pass {two_pass_seconds:.3f}s, "
+          f"single pass {single_pass_seconds:.3f}s")
+    return {'two_pass': two_pass_seconds, 'single_pass': single_pass_seconds}
+
+
+# Builds a catalog dump of full table documents, as returned by get_tables, keyed by database and table name
+def build_catalog_dump(table_count, column_count=30, table_per_database=500):
+    update_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    catalog = {}
+    for table_index in range(table_count):
+        database = catalog.setdefault(f'database_{table_index // table_per_database}', {})
+        database[f'table_{table_index}'] = {
+            'Name': f'table_{table_index}',
+            'CreateTime': update_time,
+            'UpdateTime': update_time,
+            'VersionId': '1',
+            'Parameters': {'classification': 'parquet', 'numFiles': str(table_index)},
+            'StorageDescriptor': {
+                'Columns': [
+                    {'Name': f'column_{i}', 'Type': 'string', 'Comment': f'comment {i}' if i % 2 else ''}
+                    for i in range(column_count)
+                ],
+                'Location': f's3://bucket/table_{table_index}/',
+                'InputFormat': 'org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat',
+                'SerdeInfo': {'SerializationLibrary': 'org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe'}
+            }
+        }
+    return catalog
+
+
+def benchmark_serializers(table_count=10000):
+    """
+    Compare the former indented stdlib json dump with every installed serializer backend in bulk mode.
+
+    Parameters:
+        table_count (int, optional): The number of tables in the dump.
+
+    Returns:
+        dict: The elapsed seconds of each serializer.
+    """
+    catalog = build_catalog_dump(table_count)
+
+    def dump_indented_json():
+        return json.dumps(catalog, indent=4, default=serialize_datetime).encode()
+
+    results = {}
+    baseline, results['json_indented'] = timed(dump_indented_json)
+    for name, dumps in SERIALIZERS.items():
+        if SERIALIZER_MODULES[name] is None:
+            continue
+        data, results[name] = timed(dumps, catalog)
+        if sum(map(len, json.loads(data).values())) != table_count:
+            raise AssertionError(f"The {name} serializer dropped tables")
+
+    print(f"Serialization of {table_count} tables ({len(baseline) / 1e6:.1f} MB indented): " +
+          ", ".join(f"{name} {seconds:.3f}s" for name, seconds in results.items()))
+    return results
+
+
+# Parses every table document on its own, like boto3 parsing get_tables pages, so no strings are shared
+def parse_table_documents(catalog):
+    for database in catalog.values():
+        for table in database.values():
+            yield json.loads(json.dumps(table, default=serialize_datetime))
+
+
+# Measures the memory allocated by the objects a function returns
+def traced_memory(function, *args):
+    tracemalloc.start()
+    try:
+        result = function(*args)
+        return result, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_table_model(table_count=20000):
+    """
+    Compare the memory held by boto3-style table dictionaries and by compact tables.
+
+    Parameters:
+        table_count (int, optional): The number of tables held.
+
+    Returns:
+        dict: The allocated bytes of each representation.
+    """
+    catalog = build_catalog_dump(table_count)
+
+    dicts, dict_bytes = traced_memory(lambda: list(parse_table_documents(catalog)))
+    tables, table_bytes = traced_memory(lambda: [Table.from_response(table) for table in
+                                                 parse_table_documents(catalog)])
+
+    if [table.to_response() for table in tables] != dicts:
+        raise AssertionError("The compact tables do not convert back to the table dictionaries")
+
+    print(f"Memory of {table_count} tables: dictionaries {dict_bytes / 1e6:.1f} MB, "
+          f"compact tables {table_bytes / 1e6:.1f} MB")
+    return {'dictionaries': dict_bytes, 'compact_tables': table_bytes}
+
+
+def benchmark_descriptor_sharing(table_count=20000):
+    """
+    Compare the memory and cache size of tables created from one template, with and without sharing their
+    identical column lists and descriptors.
+
+    Parameters:
+        table_count (int, optional): The number of tables held.
+
+    Returns:
+        dict: The allocated bytes of the compact tables and the cache size in bytes, each without and with sharing.
+    """
+    catalog = build_catalog_dump(table_count)
+    results = {}
+
+    tables, results['unshared_bytes'] = traced_memory(lambda: [Table.from_response(table) for table in
+                                                               parse_table_documents(catalog)])
+    pool = DescriptorPool()
+    shared_tables, results['shared_bytes'] = traced_memory(lambda: [Table.from_response(table, pool) for table in
+                                                                    parse_table_documents(catalog)])
+    if [table.to_response() for table in shared_tables] != [table.to_response() for table in tables]:
+        raise AssertionError("The shared tables do not convert back to the table dictionaries")
+
+    with tempfile.TemporaryDirectory() as directory:
+        table_cache = TableCache(os.path.join(directory, 'table_cache.sqlite'))
+        for table in tables:
+            table_cache.put(None, 'benchmark_db', table.to_response())
+        results['cache_bytes'] = table_cache.size_bytes
+        unshared_cache_bytes = sum(len(json.dumps(table.to_response(), default=str)) for table in tables)
+        results['unshared_cache_bytes'] = unshared_cache_bytes
+        if table_cache.get(None, 'benchmark_db', tables[0].name) != json.loads(
+                json.dumps(tables[0].to_response(), default=str)):
+            raise AssertionError("The cached table does not reassemble from its shared descriptors")
+        table_cache.close()
+
+    print(f"Descriptor sharing of {table_count} tables: memory {results['unshared_bytes'] / 1e6:.1f} MB unshared, "
+          f"{results['shared_bytes'] / 1e6:.1f} MB shared ({pool.stats()['documents']} distinct documents), "
+          f"cache {unshared_cache_bytes / 1e6:.1f} MB unshared, {results['cache_bytes'] / 1e6:.1f} MB shared")
+    return results
+
+
+def main():
+    benchmark_column_merge()
+    benchmark_column_classification()
+    benchmark_serializers()
+    benchmark_table_model()
+    benchmark_descriptor_sharing()
+    benchmark_crawl_backends()
+
+
+if __name__ == "__main__":
+    main()
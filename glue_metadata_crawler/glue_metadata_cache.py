@@ -0,0 +1,498 @@
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import glue_metadata_config
+from glue_metadata_model import canonical_json
+
+
+# Returns the UpdateTime of a table as the ISO string stored in the cache
+def update_time_key(table):
+    update_time = table.get('UpdateTime')
+    return update_time.isoformat() if isinstance(update_time, datetime) else update_time
+
+
+# Bumped whenever the layout of the cache changes, caches of another version are rebuilt
+CACHE_SCHEMA_VERSION = 2
+
+
+# Splits the columns and the rest of the StorageDescriptor out of a table, they are stored once per distinct value
+def split_table_document(table):
+    storage_descriptor = table.get('StorageDescriptor')
+    if storage_descriptor is None:
+        return table, None, None
+    descriptor = dict(storage_descriptor)
+    columns = descriptor.pop('Columns', None)
+    document = dict(table)
+    document['StorageDescriptor'] = {'Location': descriptor.pop('Location')} if 'Location' in descriptor else {}
+    return document, descriptor, columns
+
+
+class TableCache:
+    """
+    Persistent SQLite cache of fetched Table documents, keyed by catalog, database and table name.
+
+    Every entry records the UpdateTime and VersionId of the table, so a listing tells which cached tables are
+    still current. Column lists and StorageDescriptors are hash-consed: each distinct one is stored once in the
+    descriptors table and referenced by digest. The cache is bounded in size and evicts the least recently used
+    entries first. Stored and removed tables are committed in batches, the last batch when the cache is closed.
+    """
+
+    def __init__(self, path=None, max_bytes=None, commit_interval=None):
+        """
+        Parameters:
+            path (str, optional): The SQLite database file. Default is glue_metadata_config.TABLE_CACHE_FILE.
+            max_bytes (int, optional): The maximum size of the cached documents and descriptors.
+                Default is glue_metadata_config.TABLE_CACHE_MAX_BYTES.
+            commit_interval (int, optional): The tables stored or removed per commit.
+                Default is glue_metadata_config.TABLE_CACHE_COMMIT_INTERVAL.
+        """
+        self.path = path or glue_metadata_config.TABLE_CACHE_FILE
+        self.max_bytes = max_bytes or glue_metadata_config.TABLE_CACHE_MAX_BYTES
+        self.commit_interval = commit_interval or glue_metadata_config.TABLE_CACHE_COMMIT_INTERVAL
+        self._uncommitted = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        if self._connection.execute("PRAGMA user_version").fetchone()[0] != CACHE_SCHEMA_VERSION:
+            self._connection.executescript("DROP TABLE IF EXISTS tables; DROP TABLE IF EXISTS descriptors;")
+            self._connection.execute(f"PRAGMA user_version = {CACHE_SCHEMA_VERSION}")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS tables (
+                catalog_id TEXT NOT NULL,
+                database_name TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                update_time TEXT,
+                version_id TEXT,
+                document TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                descriptor_digest TEXT,
+                columns_digest TEXT,
+                PRIMARY KEY (catalog_id, database_name, table_name)
+            );
+            CREATE INDEX IF NOT EXISTS tables_last_access ON tables (last_access);
+            CREATE INDEX IF NOT EXISTS tables_descriptor_digest ON tables (descriptor_digest);
+            CREATE INDEX IF NOT EXISTS tables_columns_digest ON tables (columns_digest);
+            CREATE TABLE IF NOT EXISTS descriptors (
+                digest TEXT PRIMARY KEY,
+                document TEXT NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        self.size_bytes = (self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM tables").fetchone()[0] +
+                           self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM descriptors").fetchone()[0])
+        with self._lock:
+            self._evict()
+            self._connection.commit()
+
+    def get(self, catalog_id, database_name, table_name, table=None):
+        """
+        Return a cached table document.
+
+        Parameters:
+            catalog_id (str): The ID of the Data Catalog, None or '' for the account catalog.
+            database_name (str): The name of the database.
+            table_name (str): The name of the table.
+            table (dict, optional): A listed version of the table. The cached document is only returned when it
+                has the same UpdateTime and VersionId.
+
+        Returns:
+            dict: The cached table document, or None on a miss.
+        """
+        key = (catalog_id or '', database_name, table_name)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT update_time, version_id, document, descriptor_digest, columns_digest FROM tables "
+                "WHERE catalog_id = ? AND database_name = ? AND table_name = ?", key).fetchone()
+            if row is None or (table is not None and (row[0], row[1]) != (update_time_key(table),
+                                                                          table.get('VersionId'))):
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._connection.execute(
+                "UPDATE tables SET last_access = ? WHERE catalog_id = ? AND database_name = ? AND table_name = ?",
+                (time.time(),) + key)
+            document = json.loads(row[2])
+            if row[3] is not None:
+                # Reassemble the StorageDescriptor from the shared descriptor and column list
+                storage_descriptor = json.loads(self._get_descriptor(row[3]))
+                if row[4] is not None:
+                    storage_descriptor['Columns'] = json.loads(self._get_descriptor(row[4]))
+                storage_descriptor.update(document['StorageDescriptor'])
+                document['StorageDescriptor'] = storage_descriptor
+            return document
+
+    def put(self, catalog_id, database_name, table):
+        """
+        Store a table document, evicting the least recently used entries when the cache is full.
+
+        Parameters:
+            catalog_id (str): The ID of the Data Catalog, None or '' for the account catalog.
+            database_name (str): The name of the database.
+            table (dict): The table document returned by get_table or get_tables.
+        """
+        table_document, descriptor, columns = split_table_document(table)
+        document = json.dumps(table_document, default=str)
+        key = (catalog_id or '', database_name, table['Name'])
+        with self._lock:
+            descriptor_digest = None if descriptor is None else self._put_descriptor(descriptor)
+            columns_digest = None if columns is None else self._put_descriptor(columns)
+            previous = self._connection.execute(
+                "SELECT size, descriptor_digest, columns_digest FROM tables "
+                "WHERE catalog_id = ? AND database_name = ? AND table_name = ?", key).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO tables VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                key + (update_time_key(table), table.get('VersionId'), document, len(document), time.time(),
+                       descriptor_digest, columns_digest))
+            self.size_bytes += len(document)
+            if previous:
+                self.size_bytes -= previous[0]
+                self._release_descriptors(previous[1:])
+            self._evict()
+            self._commit_batch()
+
+    def delete(self, catalog_id, database_name, table_name):
+        """Remove a table document, for example when the table was dropped."""
+        key = (catalog_id or '', database_name, table_name)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size, descriptor_digest, columns_digest FROM tables "
+                "WHERE catalog_id = ? AND database_name = ? AND table_name = ?", key).fetchone()
+            if row:
+                self._connection.execute(
+                    "DELETE FROM tables WHERE catalog_id = ? AND database_name = ? AND table_name = ?", key)
+                self.size_bytes -= row[0]
+                self._release_descriptors(row[1:])
+                self._commit_batch()
+
+    def table_names(self, catalog_id, database_name):
+        """Return the names of the cached tables of a database."""
+        with self._lock:
+            return {row[0] for row in self._connection.execute(
+                "SELECT table_name FROM tables WHERE catalog_id = ? AND database_name = ?",
+                (catalog_id or '', database_name))}
+
+    def get_meta(self, key, default=None):
+        """Return a value stored next to the cached tables, for example the digest of the applied new values."""
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else default
+
+    def set_meta(self, key, value):
+        """Store a value next to the cached tables."""
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+            self._connection.commit()
+            self._uncommitted = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict: The hit, miss and eviction counts, the hit rate, the number of entries and distinct descriptors
+                and their size in bytes.
+        """
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM tables").fetchone()[0]
+            descriptors = self._connection.execute("SELECT COUNT(*) FROM descriptors").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': entries,
+                'descriptors': descriptors,
+                'size_bytes': self.size_bytes
+            }
+
+    def close(self):
+        """Commit the last batch, including the access times of the returned tables, and close the cache."""
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+    def _commit_batch(self):
+        # Must be called while holding the lock, commits once commit_interval tables were stored or removed
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_interval:
+            self._connection.commit()
+            self._uncommitted = 0
+
+    def _get_descriptor(self, digest):
+        return self._connection.execute("SELECT document FROM descriptors WHERE digest = ?", (digest,)).fetchone()[0]
+
+    def _put_descriptor(self, document):
+        # Must be called while holding the lock, stores the document unless an equal one is stored already
+        text = canonical_json(document)
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        if self._connection.execute("INSERT OR IGNORE INTO descriptors VALUES (?, ?, ?)",
+                                    (digest, text, len(text))).rowcount:
+            self.size_bytes += len(text)
+        return digest
+
+    def _release_descriptors(self, digests):
+        # Must be called while holding the lock, drops the descriptors no cached table references anymore
+        for digest in digests:
+            if digest is None or self._connection.execute(
+                    "SELECT 1 FROM tables WHERE descriptor_digest = ? OR columns_digest = ? LIMIT 1",
+                    (digest, digest)).fetchone():
+                continue
+            row = self._connection.execute("SELECT size FROM descriptors WHERE digest = ?", (digest,)).fetchone()
+            if row:
+                self._connection.execute("DELETE FROM descriptors WHERE digest = ?", (digest,))
+                self.size_bytes -= row[0]
+
+    def _evict(self):
+        # Must be called while holding the lock, evicts down to 90% of the size bound to batch the deletes
+        if self.size_bytes <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        for catalog_id, database_name, table_name, size, descriptor_digest, columns_digest in \
+                self._connection.execute("SELECT catalog_id, database_name, table_name, size, descriptor_digest, "
+                                         "columns_digest FROM tables ORDER BY last_access").fetchall():
+            if self.size_bytes <= target:
+                break
+            self._connection.execute(
+                "DELETE FROM tables WHERE catalog_id = ? AND database_name = ? AND table_name = ?",
+                (catalog_id, database_name, table_name))
+            self.size_bytes -= size
+            self._release_descriptors((descriptor_digest, columns_digest))
+            self.evictions += 1
+
+
+# Bumped whenever the layout of the range cache changes, range caches of another version are rebuilt
+RANGE_CACHE_SCHEMA_VERSION = 1
+
+# The SQLite index of the range cache, next to the range files
+RANGE_CACHE_INDEX_FILE = 'index.sqlite'
+
+
+# Checks whether a file of the cache directory holds a range, its name is the digest of the range key
+def is_range_file(file_name):
+    digest = file_name.split('.', 1)[0]
+    return len(digest) == 64 and all(character in '0123456789abcdef' for character in digest)
+
+
+class RangeCache:
+    """
+    Persistent cache of S3 byte-range reads, keyed by bucket, key, ETag and byte range.
+
+    The bytes of every range are stored in a file of the cache directory named after the digest of the key, and an
+    SQLite index records their size and last access. An object rewritten in place gets another ETag, so a cached
+    range is never served for changed data. Hits are memory-mapped instead of read, the bytes are served from the
+    page cache without a copy. The cache is bounded in size and evicts the least recently used ranges first.
+    """
+
+    def __init__(self, directory=None, max_bytes=None):
+        """
+        Parameters:
+            directory (str, optional): The cache directory. Default is glue_metadata_config.RANGE_CACHE_DIR.
+            max_bytes (int, optional): The maximum size of the cached ranges.
+                Default is glue_metadata_config.RANGE_CACHE_MAX_BYTES.
+        """
+        self.directory = directory or glue_metadata_config.RANGE_CACHE_DIR
+        self.max_bytes = max_bytes or glue_metadata_config.RANGE_CACHE_MAX_BYTES
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._connection = sqlite3.connect(os.path.join(self.directory, RANGE_CACHE_INDEX_FILE), check_same_thread=False)
+        if self._connection.execute("PRAGMA user_version").fetchone()[0] != RANGE_CACHE_SCHEMA_VERSION:
+            # The range files of the previous layout are not indexed anymore
+            for file_name in os.listdir(self.directory):
+                if is_range_file(file_name):
+                    self._remove_file(file_name)
+            self._connection.execute("DROP TABLE IF EXISTS ranges")
+            self._connection.execute(f"PRAGMA user_version = {RANGE_CACHE_SCHEMA_VERSION}")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS ranges (
+                digest TEXT PRIMARY KEY,
+                bucket TEXT NOT NULL,
+                object_key TEXT NOT NULL,
+                etag TEXT NOT NULL,
+                byte_range TEXT NOT NULL,
+                object_size INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ranges_last_access ON ranges (last_access);
+        """)
+        self.size_bytes = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM ranges").fetchone()[0]
+        with self._lock:
+            self._evict()
+            self._connection.commit()
+
+    def get(self, bucket, key, etag, byte_range):
+        """
+        Return a cached range, memory-mapped.
+
+        Parameters:
+            bucket (str): The name of the bucket.
+            key (str): The key of the object.
+            etag (str): The ETag of the object.
+            byte_range (str): The HTTP range, for example 'bytes=-8'.
+
+        Returns:
+            tuple: A read-only memoryview of the cached bytes and the size of the object, or None on a miss.
+        """
+        digest = range_digest(bucket, key, etag, byte_range)
+        with self._lock:
+            row = self._connection.execute("SELECT object_size, size FROM ranges WHERE digest = ?",
+                                           (digest,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            try:
+                data = self._map_file(digest, row[1])
+            except (OSError, ValueError):
+                # The file was removed or truncated behind the index, the range is read again
+                self._connection.execute("DELETE FROM ranges WHERE digest = ?", (digest,))
+                self.size_bytes -= row[1]
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._connection.execute("UPDATE ranges SET last_access = ? WHERE digest = ?", (time.time(), digest))
+            return data, row[0]
+
+    def put(self, bucket, key, etag, byte_range, data, object_size):
+        """
+        Store a range, evicting the least recently used ranges when the cache is full.
+
+        Parameters:
+            bucket (str): The name of the bucket.
+            key (str): The key of the object.
+            etag (str): The ETag of the object.
+            byte_range (str): The HTTP range the data was read with.
+            data (bytes): The bytes of the range.
+            object_size (int): The size of the object.
+        """
+        digest = range_digest(bucket, key, etag, byte_range)
+        # Written to a temporary file and renamed, so a reader never maps a partly written range
+        path = self._path(digest)
+        temporary_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary_path, 'wb') as f:
+            f.write(data)
+        os.replace(temporary_path, path)
+        with self._lock:
+            previous = self._connection.execute("SELECT size FROM ranges WHERE digest = ?", (digest,)).fetchone()
+            self._connection.execute("INSERT OR REPLACE INTO ranges VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                     (digest, bucket, key, etag, byte_range, object_size, len(data), time.time()))
+            self.size_bytes += len(data)
+            if previous:
+                self.size_bytes -= previous[0]
+            self._evict()
+            self._connection.commit()
+
+    def stats(self):
+        """
+        Returns:
+            dict: The hit, miss and eviction counts, the hit rate, the number of cached ranges and their size in
+                bytes.
+        """
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM ranges").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': entries,
+                'size_bytes': self.size_bytes
+            }
+
+    def close(self):
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest)
+
+    def _map_file(self, digest, size):
+        if size == 0:
+            return memoryview(b'')
+        with open(self._path(digest), 'rb') as f:
+            # The mapping stays valid after the file is closed, and after it is evicted
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(mapped) != size:
+            raise ValueError(f"Cached range '{digest}' has {len(mapped)} bytes instead of {size}")
+        return memoryview(mapped)
+
+    def _remove_file(self, digest):
+        try:
+            os.remove(self._path(digest))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        # Must be called while holding the lock, evicts down to 90% of the size bound to batch the deletes
+        if self.size_bytes <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        for digest, size in self._connection.execute(
+                "SELECT digest, size FROM ranges ORDER BY last_access").fetchall():
+            if self.size_bytes <= target:
+                break
+            self._connection.execute("DELETE FROM ranges WHERE digest = ?", (digest,))
+            self._remove_file(digest)
+            self.size_bytes -= size
+            self.evictions += 1
+
+
+# Fingerprints the key of a cached range, the digest names the file holding its bytes
+def range_digest(bucket, key, etag, byte_range):
+    return hashlib.sha256(canonical_json([bucket, key, etag, byte_range]).encode()).hexdigest()
+
+
+_range_cache = None
+_range_cache_lock = threading.Lock()
+
+
+# Returns the range cache shared by the run, or None when glue_metadata_config.RANGE_CACHE_ENABLED is off
+def get_range_cache():
+    global _range_cache
+    if not glue_metadata_config.RANGE_CACHE_ENABLED:
+        return None
+    with _range_cache_lock:
+        if _range_cache is None:
+            _range_cache = RangeCache()
+        return _range_cache
+
+
+# Fingerprints the new column comments, a cached table is only current if the same new values were applied to it
+def new_values_digest(new_values):
+    return hashlib.sha256(json.dumps(new_values, sort_keys=True).encode()).hexdigest()
+
+
+def revalidate_table(table_cache, catalog_id, database_name, table):
+    """
+    Compare a listed table with the cache. A changed table is not stored here: the caller stores it once its update
+    succeeded or was not needed, so the cache never holds a table the new values were not applied to.
+
+    Parameters:
+        table_cache (TableCache): The table cache.
+        catalog_id (str): The ID of the Data Catalog, None or '' for the account catalog.
+        database_name (str): The name of the database the table was listed from.
+        table (dict): The listed table, for example from get_database_tables.
+
+    Returns:
+        bool: False when the cached table has the same UpdateTime and VersionId, True otherwise.
+    """
+    return table_cache.get(catalog_id, database_name, table['Name'], table) is None
+
+
+# Drops the cached tables of a database that are no longer listed, they were deleted since the last run
+def prune_tables(table_cache, catalog_id, database_name, listed_table_names):
+    for table_name in table_cache.table_names(catalog_id, database_name) - set(listed_table_names):
+        table_cache.delete(catalog_id, database_name, table_name)
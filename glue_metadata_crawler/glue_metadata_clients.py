@@ -0,0 +1,114 @@
+import threading
+
+import boto3
+from botocore.config import Config
+
+import glue_metadata_config
+from glue_metadata_rate_limiter import rate_limiter
+
+
+class ClientRegistry:
+    """
+    Process-wide registry of boto3 sessions and clients.
+
+    Sessions are keyed by (profile, region) and clients by (profile, region, service). Each one is built lazily on
+    first use and exactly once, boto3 clients are thread-safe so every worker shares the same client. Clients are
+    rate limited by the shared rate limiter when glue_metadata_config.RATE_LIMIT_ENABLED is set and their service
+    is listed in glue_metadata_config.RATE_LIMITED_SERVICES.
+    """
+
+    def __init__(self, max_pool_connections=None):
+        """
+        Parameters:
+            max_pool_connections (int, optional): The connection pool size of every client.
+                Default is glue_metadata_config.MAX_WORKERS.
+        """
+        self.max_pool_connections = max_pool_connections or glue_metadata_config.MAX_WORKERS
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._clients = {}
+        self._construction_counts = {}
+        self._client_requests = 0
+
+    def get_session(self, profile_name=None, region_name=None):
+        """
+        Return the session of the profile and region, creating it on first use.
+
+        Parameters:
+            profile_name (str, optional): The AWS named profile. Default is glue_metadata_config.PROFILE_NAME.
+            region_name (str, optional): The AWS region. Default is glue_metadata_config.REGION_NAME.
+
+        Returns:
+            boto3.Session: The shared session.
+        """
+        key = (profile_name or glue_metadata_config.PROFILE_NAME, region_name or glue_metadata_config.REGION_NAME)
+        with self._lock:
+            return self._get_or_create_session(key)
+
+    def get_client(self, service_name, profile_name=None, region_name=None):
+        """
+        Return the client of the service, profile and region, creating it on first use.
+
+        Parameters:
+            service_name (str): The AWS service, for example 'glue' or 's3'.
+            profile_name (str, optional): The AWS named profile. Default is glue_metadata_config.PROFILE_NAME.
+            region_name (str, optional): The AWS region. Default is glue_metadata_config.REGION_NAME.
+
+        Returns:
+            botocore.client.BaseClient: The shared client.
+        """
+        key = (profile_name or glue_metadata_config.PROFILE_NAME, region_name or glue_metadata_config.REGION_NAME,
+               service_name)
+        with self._lock:
+            self._client_requests += 1
+            client = self._clients.get(key)
+            if client is None:
+                # boto3 sessions are not thread-safe, clients are therefore built while holding the lock
+                session = self._get_or_create_session(key[:2])
+                client = session.client(service_name, config=Config(max_pool_connections=self.max_pool_connections))
+                if glue_metadata_config.RATE_LIMIT_ENABLED:
+                    rate_limiter.attach(client)
+                self._clients[key] = client
+                self._count_construction(key)
+            return client
+
+    def stats(self):
+        """
+        Return the construction counts of the registry.
+
+        Returns:
+            dict: The number of sessions and clients built, the number of client requests and the construction
+                count of every 'profile/region/service' key.
+        """
+        with self._lock:
+            return {
+                'sessions_created': sum(count for key, count in self._construction_counts.items() if len(key) == 2),
+                'clients_created': sum(count for key, count in self._construction_counts.items() if len(key) == 3),
+                'client_requests': self._client_requests,
+                'construction_counts': {
+                    '/'.join(part or '' for part in key): count for key, count in self._construction_counts.items()
+                }
+            }
+
+    def clear(self):
+        """Drop every cached session and client, the next request builds them again."""
+        with self._lock:
+            self._sessions.clear()
+            self._clients.clear()
+
+    def _get_or_create_session(self, key):
+        # Must be called while holding the lock
+        session = self._sessions.get(key)
+        if session is None:
+            profile_name, region_name = key
+            session = boto3.Session(profile_name=profile_name, region_name=region_name or None)
+            self._sessions[key] = session
+            self._count_construction(key)
+        return session
+
+    def _count_construction(self, key):
+        self._construction_counts[key] = self._construction_counts.get(key, 0) + 1
+
+
+# The registry shared by the whole process
+client_registry = ClientRegistry()
@@ -1,6 +1,7 @@
 # config.py : AWS details
 
 # AWS related configuration details
+PROFILE_NAME = 'fpac'  # The AWS named profile used to create sessions
 AWS_ACCESS_KEY_ID = ''
 AWS_SECRET_ACCESS_KEY = ''
 REGION_NAME = ''
@@ -12,4 +13,76 @@ DATABASE_NAME = ''  # The name of the database in the catalog in which the table
 TABLE_NAME = ''
 CATALOG_ID = ''  # The ID of the Data Catalog where the tables reside
 
+# Crawl mode details
+CRAWL_MODE = 'table'  # 'table' crawls TABLE_NAME only, 'catalog' crawls every table of CRAWL_DATABASES
+# 'incremental' crawls only the tables of CRAWL_DATABASES modified since the last crawl
+# 'partitions' registers the partitions found in S3 under the table locations of CRAWL_DATABASES
+# 'schema' infers the schema of TABLE_NAME from the Parquet footers under BUCKET_NAME/OBJECT_NAME or its location
+# 'drift' compares the columns of the tables of CRAWL_DATABASES with a sample of their Parquet files
+# 'stats' refreshes the numFiles and totalSize parameters of the tables of CRAWL_DATABASES from S3 listings
+CRAWL_DATABASES = []  # Databases to crawl in 'catalog' mode, empty list crawls all databases in the catalog
+CRAWL_TABLE_NAME_PATTERN = ''  # Shell-style pattern selecting the crawled tables, for example 'sales_*'
+CRAWL_TABLE_TYPES = []  # Table types selecting the crawled tables, for example ['EXTERNAL_TABLE']
+CATALOG_OUTPUT_FILE = 'catalog_metadata.json'  # '.ndjson', '.ndjson.gz' or '.ndjson.zst' streams one record per table
+CATALOG_UPDATE = False  # Add or update missing column comments of every crawled table in 'catalog' mode
+CATALOG_UPDATE_REPORT_FILE = 'update_report.json'  # Changed and unchanged column counts of every updated table
+INCREMENTAL_STATE_FILE = 'crawl_state.json'  # High-water mark of the last 'incremental' crawl
+INCREMENTAL_CLOCK_SKEW_SECONDS = 300  # Safety margin below the high-water mark, the local clock may run ahead of AWS
+MAX_UPDATE_RETRIES = 5  # Retries of update_table after a concurrent modification of the table
+MAX_WORKERS = 16  # Worker threads of the parallel crawler, also the size of the Glue client connection pool
+DESCRIPTOR_POOL_SIZE = 10000  # Distinct column lists and descriptors shared by the tables waiting to be crawled
+
+# Table cache details, revalidated tables that did not change since the last run are not updated again
+TABLE_CACHE_ENABLED = False
+TABLE_CACHE_FILE = 'table_cache.sqlite'
+TABLE_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+TABLE_CACHE_COMMIT_INTERVAL = 500  # Cached tables stored or removed per SQLite commit
+
+# Client-side rate limiter details, rates are in requests per second and adapt to throttling
+RATE_LIMIT_ENABLED = True
+RATE_LIMITED_SERVICES = ['glue']  # S3 allows thousands of requests per second per prefix and retries SlowDown itself
+RATE_LIMIT_DEFAULT = 20  # Initial rate of every API operation not listed in RATE_LIMITS
+RATE_LIMIT_MAX = 100  # Highest rate an API operation grows to
+RATE_LIMITS = {
+    'GetTables': 10,
+    'GetPartitions': 10,
+    'UpdateTable': 5
+}
+
+# asyncio crawler details, the maximum number of requests in flight per service
+GLUE_MAX_CONCURRENCY = 100
+S3_MAX_CONCURRENCY = 100
+
+# Partition scan details
+PARTITION_SEGMENTS = 10  # Parallel get_partitions segments per table, at most 10
+PROPAGATE_PARTITION_COMMENTS = False  # Copy the column comments of updated tables to their partitions
+DELETE_VANISHED_PARTITIONS = False  # Remove partitions whose S3 prefix holds no object anymore in 'partitions' mode
+PARTITION_REPORT_FILE = 'partition_report.json'  # Discovered, created and deleted partitions of every table
+
+# Table statistics details of 'stats' mode
+STATS_DRIFT_THRESHOLD = 0.05  # Relative difference above which numFiles and totalSize are written back
+STATS_LISTING_WORKERS = 4  # Key ranges of a table location listed at the same time
+STATS_REPORT_FILE = 'stats_report.json'  # Computed statistics of every table and whether they were written
+
+# Parquet schema inference details of 'schema' mode, only the footers of the sampled files are read
+PARQUET_SAMPLE_FILES = 10  # Parquet files sampled per location, spread evenly over the listed keys
+PARQUET_FOOTER_TAIL_BYTES = 8  # Bytes of the first ranged GET, a tail such as 65536 often holds the whole footer
+PARQUET_FOOTER_CACHE_SIZE = 10000  # Parsed footers kept in memory, keyed by ETag
+SCHEMA_INFERENCE_FILE = 'inferred_schema.json'  # Inferred columns and their comparison with the Glue Columns
+
+# S3 range cache details, footers read by 'schema' and 'drift' modes are kept on disk keyed by ETag
+RANGE_CACHE_ENABLED = False
+RANGE_CACHE_DIR = 'range_cache'  # Directory of the cached ranges and their SQLite index
+RANGE_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+# Schema drift details of 'drift' mode
+DRIFT_FILES_PER_PARTITION = 2  # Parquet files sampled per partition, or per unpartitioned table
+DRIFT_MAX_PARTITIONS = 50  # Partitions sampled per table, spread evenly over its partition locations
+DRIFT_PROCESSES = None  # Worker processes parsing footers and comparing schemas, None uses one per CPU
+DRIFT_REPORT_FILE = 'drift_report.json'  # '.ndjson', '.ndjson.gz' or '.ndjson.zst' streams one record per table
+
+# Output serialization details
+SERIALIZER = 'auto'  # 'orjson', 'msgspec' or 'json', 'auto' picks the fastest installed library
+PRETTY_OUTPUT = False  # Indent the catalog outputs and update reports, single-table outputs are always indented
+
 # SCHEMA_NAME = ''
@@ -1,9 +1,23 @@
+import fnmatch
 import json
+import os
 
-import boto3
 import logging
+import multiprocessing
 import glue_metadata_config
-from datetime import datetime
+from glue_metadata_cache import TableCache, get_range_cache, new_values_digest, revalidate_table, prune_tables
+from glue_metadata_clients import client_registry
+from glue_metadata_model import DescriptorPool, Table
+from glue_metadata_output import NdjsonWriter, is_ndjson_output, write_json
+from glue_metadata_parquet import compare_columns, footer_cache, infer_location_schema, infer_schema
+from glue_metadata_drift import build_drift_record, collect_table_footers
+from glue_metadata_partitions import get_worker_segments, propagate_column_comments
+from glue_metadata_rate_limiter import rate_limiter
+from glue_metadata_s3 import get_worker_listing_workers, is_data_file, list_objects_parallel, parse_s3_location, \
+    sync_table_partitions
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from datetime import datetime, timedelta, timezone
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -25,75 +39,40 @@ def get_aws_token():
 
 
 #  Creates an AWS S3 client using the provided credentials and returns it.
+#  The client is built once per process by the client registry and shared by every caller.
 def login_to_aws_s3():
     try:
-        s3_client = boto3.Session(profile_name='fpac').client(
-            's3'
-        )
+        s3_client = client_registry.get_client('s3')
         return s3_client
     except Exception as e:
         raise ConnectionError("Error connecting to AWS S3 Bucket : ", str(e))
 
 
 # Creates an AWS Glue client using the provided credentials and returns it
+# The client is built once per process by the client registry, its connection pool is sized to MAX_WORKERS
 def login_to_aws_glue():
     try:
-        glue_client = boto3.Session(profile_name='fpac').client(
-            'glue'
-        )
+        glue_client = client_registry.get_client('glue')
         return glue_client
     except Exception as e:
         raise ConnectionError("Error connecting to AWS Glue : ", str(e))
 
 
-def serialize_datetime(obj):
-    """
-    Helper function to serialize datetime objects.
-
-    This function checks if the provided object is an instance of the datetime class.
-    Parameters:
-        obj (Any): The object to be serialized.
-
-    Returns:
-        str: A JSON-compatible representation of the datetime object.
-
-    Raises:
-        TypeError: If the provided object is not an instance of the datetime class.
-    """
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    raise TypeError("Object of type '{}' is not JSON serializable".format(type(obj)))
-
-
-class DateTimeEncoder(json.JSONEncoder):
-    def default(self, obj):
-        """
-        Override the default method of json.JSONEncoder.
-
-        Parameters:
-            obj (Any): The Python object to be serialized.
-
-        Returns:
-            str: A JSON-compatible representation of the object.
-        """
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
-
-
 # Retrieves all metadata associated with a specific table in the AWS Glue Data Catalog.
-def get_table_metadata(database_name, table_name):
+def get_table_metadata(database_name, table_name, glue_client=None):
     """
     Retrieves all metadata associated with a table in AWS Glue Data Catalog.
 
     Parameters:
         database_name (str): The name of the database where the table resides.
         table_name (str): The name of the table for which to retrieve metadata.
+        glue_client (optional): Boto3 Glue client. Default is the shared client of the client registry.
 
     Returns:
         dict: A dictionary containing all table metadata.
     """
-    glue_client = login_to_aws_glue()
+    if glue_client is None:
+        glue_client = login_to_aws_glue()
     access_key, secret_key, region_name, bucket_name, database_name, catalog_id, object_name, table_name = get_aws_token()
 
     try:
@@ -118,6 +97,62 @@ def get_table_metadata(database_name, table_name):
         return None
 
 
+class ColumnClassification:
+    """
+    The columns of a table split into columns with a default comment and columns with a missing comment.
+
+    Attributes:
+        default_values (dict): The comment of every column with a non-blank comment, keyed by column name.
+        missing_columns (dict): None for every column with a blank or no comment, keyed by column name. The
+            flagged missing values come first, then the other columns in table order.
+    """
+    __slots__ = ('default_values', 'missing_columns')
+
+    def __init__(self, default_values, missing_columns):
+        self.default_values = default_values
+        self.missing_columns = missing_columns
+
+    def as_dict(self):
+        """Return the 'default_values' and 'missing_columns' sections written to the outputs."""
+        return {
+            "default_values": self.default_values,
+            "missing_columns": self.missing_columns
+        }
+
+
+def classify_columns(metadata, missing_values=()):
+    """
+    Classify the columns of a table in a single pass.
+
+    Parameters:
+        metadata (dict): A dictionary containing table metadata.
+        missing_values (iterable, optional): The column names flagged as missing, they come first in the
+            missing columns.
+
+    Returns:
+        ColumnClassification: The default values and missing columns of the table.
+    """
+    if not isinstance(missing_values, (set, frozenset)):
+        missing_values = set(missing_values)
+
+    default_values = {}
+    flagged_columns = {}
+    other_columns = {}
+    for column in metadata.get('StorageDescriptor', {}).get('Columns', []):
+        name = column.get('Name')
+        comment = column.get('Comment')
+        if comment is not None and comment.strip():
+            default_values[name] = comment
+        elif name in missing_values:
+            flagged_columns[name] = None
+        else:
+            other_columns[name] = None
+
+    # Names are either flagged or not, the two groups never share a column
+    flagged_columns.update(other_columns)
+    return ColumnClassification(default_values, flagged_columns)
+
+
 def write_metadata_and_missing_values(metadata, missing_values, output_file="default_metadata.json"):
     """
     Write metadata and missing column information to a JSON file.
@@ -131,112 +166,1050 @@ def write_metadata_and_missing_values(metadata, missing_values, output_file="def
         None
     """
     try:
-        default_values = {}
-        missing_columns = {}
-
-        for column in metadata.get('StorageDescriptor', {}).get('Columns', []):
-            name = column.get('Name')
-            comment = column.get('Comment')
-            if comment is not None and comment.strip() != "":
-                default_values[name] = comment
-
-            if name in missing_values and (comment is None or comment.strip() == ""):
-                missing_columns[name] = None
-
-        # Add any missing columns with default comment missing to the 'missing_columns' section
-        for column in metadata.get('StorageDescriptor', {}).get('Columns', []):
-            name = column.get('Name')
-            comment = column.get('Comment')
-            if name not in missing_columns and (comment is None or comment.strip() == ""):
-                missing_columns[name] = None
-
-        data = {
-            "default_values": default_values,
-            "missing_columns": missing_columns
-        }
+        data = classify_columns(metadata, missing_values).as_dict()
 
-        with open(output_file, 'w') as f:
-            json.dump(data, f, indent=4, default=serialize_datetime)
+        # Single-table outputs are read by people, they are always indented
+        write_json(data, output_file, pretty=True)
 
     except Exception as e:
         print(f" ***** Error during metadata writing: {e}")
 
 
-def add_update_and_inherit_properties(glue_client, database_name, table_name, metadata):
+# Builds the optional CatalogId argument, Glue rejects an empty CatalogId so it is only sent when configured
+def catalog_id_kwargs(catalog_id):
+    return {'CatalogId': catalog_id} if catalog_id else {}
+
+
+# Lists the names of all databases in the AWS Glue Data Catalog.
+def get_catalog_database_names(glue_client, catalog_id=None):
     """
-    Add or update missing column comments and inherit other properties in AWS Glue table's metadata.
+    Yield the name of every database in the AWS Glue Data Catalog using the get_databases paginator.
 
     Parameters:
         glue_client: Boto3 Glue client.
-        database_name (str): The name of the database where the table resides.
-        table_name (str): The name of the table for which to update missing values.
+        catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+
+    Returns:
+        generator: Database names.
+    """
+    paginator = glue_client.get_paginator('get_databases')
+    for page in paginator.paginate(**catalog_id_kwargs(catalog_id)):
+        for database in page['DatabaseList']:
+            yield database['Name']
+
+
+# Lists the full definition of every table in a database, one get_tables call returns up to 100 tables.
+def get_database_tables(glue_client, database_name, catalog_id=None):
+    """
+    Yield the full table definition of every table in a database using the get_tables paginator.
+
+    Parameters:
+        glue_client: Boto3 Glue client.
+        database_name (str): The name of the database to list.
+        catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+
+    Returns:
+        generator: Table dictionaries as returned in the 'TableList' of get_tables.
+    """
+    paginator = glue_client.get_paginator('get_tables')
+    for page in paginator.paginate(DatabaseName=database_name, **catalog_id_kwargs(catalog_id)):
+        for table in page['TableList']:
+            yield table
+
+
+# Lists lightweight table entries of a database, get_tables returns only the requested attributes
+def list_database_tables(glue_client, database_name, catalog_id=None, attributes=('NAME', 'TABLE_TYPE')):
+    """
+    Yield every table of a database with only the requested attributes, for planning and selecting tables.
+
+    Parameters:
+        glue_client: Boto3 Glue client.
+        database_name (str): The name of the database to list.
+        catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+        attributes (tuple, optional): The get_tables AttributesToGet, 'NAME' is always requested.
+            Default is ('NAME', 'TABLE_TYPE').
+
+    Returns:
+        generator: Table dictionaries holding only the requested attributes, for example 'Name' and 'TableType'.
+    """
+    attributes_to_get = ['NAME'] + [attribute for attribute in attributes if attribute != 'NAME']
+    paginator = glue_client.get_paginator('get_tables')
+    for page in paginator.paginate(DatabaseName=database_name, AttributesToGet=attributes_to_get,
+                                   **catalog_id_kwargs(catalog_id)):
+        for table in page['TableList']:
+            yield table
+
+
+def make_table_filter(name_pattern=None, table_types=None):
+    """
+    Build a selection filter on the lightweight table entries of list_database_tables.
+
+    Parameters:
+        name_pattern (str, optional): A shell-style pattern the table name must match, for example 'sales_*'.
+        table_types (list, optional): The accepted table types, for example ['EXTERNAL_TABLE'].
+
+    Returns:
+        function: The filter, or None when no selection is configured.
+    """
+    if not name_pattern and not table_types:
+        return None
+
+    def table_filter(table):
+        if name_pattern and not fnmatch.fnmatchcase(table['Name'], name_pattern):
+            return False
+        return not table_types or table.get('TableType') in table_types
+
+    return table_filter
+
+
+def get_catalog_tables_parallel(glue_client, executor, catalog_id=None, database_names=None, table_filter=None,
+                                max_pending=None):
+    """
+    Yield every table of the given databases, listing the databases concurrently on the executor.
+
+    With a table filter the databases are listed with names and types only, and the full definition is fetched
+    with get_table only for the tables that pass the filter. At most `max_pending` listings and fetches run or wait
+    for the caller at a time, the next one is submitted as the caller consumes the tables, so a slow caller does not
+    let the listings of the whole catalog pile up in memory.
+
+    Parameters:
+        glue_client: Boto3 Glue client, shared by all workers.
+        executor (ThreadPoolExecutor): The worker pool running the get_tables paginators.
+        catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+        database_names (list, optional): The databases to list. Default is every database in the catalog.
+        table_filter (function, optional): Selects tables from their lightweight entries, see make_table_filter.
+        max_pending (int, optional): The number of database listings, and of table fetches, in flight.
+            Default is glue_metadata_config.MAX_WORKERS.
+
+    Returns:
+        generator: (database_name, table) tuples in the order the databases finish listing.
+    """
+    if not database_names:
+        database_names = get_catalog_database_names(glue_client, catalog_id)
+    max_pending = max_pending or glue_metadata_config.MAX_WORKERS
+
+    # Listed and fetched tables wait as compact tables until the caller consumes them, identical column lists
+    # and descriptors of tables created from the same template are held once
+    pool = DescriptorPool()
+
+    def list_tables(database_name):
+        if table_filter is None:
+            return [Table.from_response(table, pool) for table in get_database_tables(glue_client, database_name,
+                                                                                       catalog_id)]
+        return [table['Name'] for table in list_database_tables(glue_client, database_name, catalog_id)
+                if table_filter(table)]
+
+    def fetch_table(database_name, table_name):
+        response = glue_client.get_table(DatabaseName=database_name, Name=table_name,
+                                         **catalog_id_kwargs(catalog_id))
+        return Table.from_response(response['Table'], pool)
+
+    pending_databases = iter(database_names)
+    pending_fetches = deque()
+    listing_futures = {}
+    fetch_futures = {}
+
+    def submit_next():
+        while len(listing_futures) < max_pending:
+            database_name = next(pending_databases, None)
+            if database_name is None:
+                break
+            listing_futures[executor.submit(list_tables, database_name)] = database_name
+        while pending_fetches and len(fetch_futures) < max_pending:
+            database_name, table_name = pending_fetches.popleft()
+            fetch_futures[executor.submit(fetch_table, database_name, table_name)] = database_name
+
+    submit_next()
+    while listing_futures or fetch_futures:
+        done, _ = wait(list(listing_futures) + list(fetch_futures), return_when=FIRST_COMPLETED)
+        for future in done:
+            if future in fetch_futures:
+                database_name = fetch_futures.pop(future)
+                try:
+                    table = future.result()
+                except glue_client.exceptions.EntityNotFoundException:
+                    # The table was dropped between listing and fetching it
+                    continue
+                yield database_name, table.to_response()
+                continue
+
+            database_name = listing_futures.pop(future)
+            try:
+                tables = future.result()
+            except glue_client.exceptions.EntityNotFoundException:
+                print(f"***** Database '{database_name}' not found in the catalog.")
+                continue
+            if table_filter is None:
+                # Release every table of the listing once it is consumed
+                tables.reverse()
+                while tables:
+                    yield database_name, tables.pop().to_response()
+            else:
+                pending_fetches.extend((database_name, table_name) for table_name in tables)
+        submit_next()
+
+    logger.info("Descriptor pool stats: %s", pool.stats())
+
+
+def crawl_tables(glue_client, executor, tables, catalog_metadata, catalog_id=None, update_tables=False,
+                 new_values=None, table_cache=None, new_values_applied=False, writer=None, prune_cache=False,
+                 max_pending_updates=None, partition_segments=None):
+    """
+    Analyze a stream of tables into the catalog metadata and update them on the worker pool.
+
+    Parameters:
+        glue_client: Boto3 Glue client, shared by all workers.
+        executor (ThreadPoolExecutor): The worker pool running the updates.
+        tables (iterable): (database_name, table) tuples, for example from get_catalog_tables_parallel.
+        catalog_metadata (dict): Default values and missing columns keyed by database name and table name,
+            updated in place. Ignored when a writer is given.
+        catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+        update_tables (bool, optional): Add or update the missing column comments of every table.
+        new_values (dict, optional): The new column comments.
+        table_cache (TableCache, optional): Revalidates the tables against the cache when updating them, a table is
+            stored once its update succeeded or was not needed.
+        new_values_applied (bool, optional): The cached tables already had the same new values applied, tables that
+            did not change since are not updated again.
+        writer (NdjsonWriter, optional): Streams one record per table instead of collecting the catalog metadata.
+        prune_cache (bool, optional): The tables are a full listing, cached tables that were not listed are dropped.
+        max_pending_updates (int, optional): The number of updates submitted to the pool but not finished yet,
+            the listing waits when it is reached. Default is four times glue_metadata_config.MAX_WORKERS.
+        partition_segments (int, optional): The number of parallel segments of the partition scans copying the
+            column comments to the partitions, see get_worker_segments.
+
+    Returns:
+        dict: The changed and unchanged column counts of every updated table, keyed by database and table name.
+    """
+    max_pending_updates = max_pending_updates or 4 * glue_metadata_config.MAX_WORKERS
+    update_report = {}
+
+    def update_table(database_name, table_name, table, table_context):
+        add_update_and_inherit_properties(glue_client, database_name, table_name, table, new_values, table_context,
+                                          partition_segments=partition_segments)
+        if table_cache is not None:
+            # Cache the updated table with its new VersionId, so the next run does not see it as changed
+            table_cache.put(catalog_id, database_name, table_context.get_table(glue_client) if table_context.stale
+                            else table_context.table)
+    update_futures = {}
+    listed_table_names = {}
+
+    def collect_updates(futures):
+        for future in futures:
+            table_context = update_futures.pop(future)
+            try:
+                future.result()
+            except Exception as e:
+                print(f" ***** Error updating table '{table_context.database_name}.{table_context.table_name}': {e}")
+                # Drop the table from the cache so the next run updates it again
+                if table_cache is not None:
+                    table_cache.delete(catalog_id, table_context.database_name, table_context.table_name)
+            if table_context.update_report is not None:
+                update_report.setdefault(table_context.database_name, {})[table_context.table_name] = \
+                    table_context.update_report
+
+    for database_name, table in tables:
+        table_name = table['Name']
+        analysis = classify_columns(table).as_dict()
+        if writer is not None:
+            writer.write({'database': database_name, 'table': table_name, **analysis})
+        else:
+            catalog_metadata.setdefault(database_name, {})[table_name] = analysis
+        if prune_cache:
+            listed_table_names.setdefault(database_name, set()).add(table_name)
+        changed = True
+        if update_tables and table_cache is not None:
+            changed = revalidate_table(table_cache, catalog_id, database_name, table)
+        if update_tables and (changed or not new_values_applied):
+            # Bound the updates in flight, so the fetched tables do not pile up in memory behind a slow pool
+            if len(update_futures) >= max_pending_updates:
+                collect_updates(wait(update_futures, return_when=FIRST_COMPLETED).done)
+            table_context = TableContext(database_name, table_name, table, catalog_id)
+            future = executor.submit(update_table, database_name, table_name, table, table_context)
+            update_futures[future] = table_context
+
+    collect_updates(list(as_completed(update_futures)))
+
+    if prune_cache and table_cache is not None:
+        for database_name, table_names in listed_table_names.items():
+            prune_tables(table_cache, catalog_id, database_name, table_names)
+    return update_report
+
+
+# Writes the catalog metadata, unless it was streamed, and the update report when tables were updated
+def write_catalog_outputs(catalog_metadata, update_report=None, output_file="catalog_metadata.json",
+                          report_file="update_report.json"):
+    if catalog_metadata is not None:
+        write_json(catalog_metadata, output_file)
+
+    if update_report is not None:
+        write_json(update_report, report_file)
+
+
+def crawl_catalog_metadata(glue_client, catalog_id=None, database_names=None, output_file="catalog_metadata.json",
+                           max_workers=1, update_tables=False, new_values=None, report_file="update_report.json",
+                           table_cache=None, table_filter=None):
+    """
+    Crawl every table of the given databases and write their default and missing column comments to a JSON file.
+
+    Databases are listed and tables are updated on one bounded worker pool sharing the Glue client. When the output
+    file ends with '.ndjson' or '.jsonl', optionally followed by '.gz' or '.zst', one record per table is streamed
+    to it while crawling instead, so memory stays flat on catalogs of any size.
+
+    Parameters:
+        glue_client: Boto3 Glue client.
+        catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+        database_names (list, optional): The databases to crawl. Default is every database in the catalog.
+        output_file (str, optional): The name of the output JSON file. Default is "catalog_metadata.json".
+        max_workers (int, optional): The number of worker threads. Default is 1.
+        update_tables (bool, optional): Add or update the missing column comments of every crawled table.
+        new_values (dict, optional): The new column comments, loaded from 'new_values.json' when not given.
+        report_file (str, optional): The name of the JSON file with the changed and unchanged column counts of
+            every updated table. Default is "update_report.json".
+        table_cache (TableCache, optional): Revalidates the listed tables against the cache. Tables that did not
+            change since the last run with the same new values are not updated again.
+        table_filter (function, optional): Only crawl the tables selected by the filter, see make_table_filter.
+
+    Returns:
+        dict: Default values and missing columns keyed by database name and table name, empty when streamed.
+    """
+    if update_tables and new_values is None:
+        new_values = load_new_values()
+
+    # Cached tables are only current when the last run applied the same new values
+    digest = new_values_digest(new_values) if update_tables else None
+    new_values_applied = table_cache is not None and table_cache.get_meta('new_values_digest') == digest
+    if update_tables and table_cache is not None and not new_values_applied:
+        # Tables cached from now on carry the new values, the digest is only stored once the crawl completes
+        table_cache.set_meta('new_values_digest', None)
+
+    catalog_metadata = {}
+    writer = NdjsonWriter(output_file) if is_ndjson_output(output_file) else None
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            tables = get_catalog_tables_parallel(glue_client, executor, catalog_id, database_names, table_filter)
+            update_report = crawl_tables(glue_client, executor, tables, catalog_metadata, catalog_id, update_tables,
+                                         new_values, table_cache, new_values_applied, writer, prune_cache=True,
+                                         max_pending_updates=4 * max_workers,
+                                         partition_segments=get_worker_segments(max_workers))
+    finally:
+        if writer is not None:
+            writer.close()
+
+    write_catalog_outputs(None if writer else catalog_metadata, update_report if update_tables else None,
+                          output_file, report_file)
+
+    if table_cache is not None:
+        if update_tables:
+            table_cache.set_meta('new_values_digest', digest)
+        logger.info("Table cache stats: %s", table_cache.stats())
+
+    return catalog_metadata
+
+
+def get_updated_tables(glue_client, updated_since, catalog_id=None, database_names=None, table_filter=None):
+    """
+    Yield the tables updated since a point in time, using search_tables with an UpdateTime filter.
+
+    Parameters:
+        glue_client: Boto3 Glue client.
+        updated_since (datetime): The high-water mark of the last crawl.
+        catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+        database_names (list, optional): Only yield the tables of these databases. Default is every database.
+        table_filter (function, optional): Only yield the tables selected by the filter, see make_table_filter.
+
+    Returns:
+        generator: (database_name, table) tuples.
+    """
+    kwargs = dict(Filters=[{'Key': 'UpdateTime', 'Value': updated_since.isoformat(),
+                            'Comparator': 'GREATER_THAN_EQUALS'}],
+                  MaxResults=1000, **catalog_id_kwargs(catalog_id))
+    while True:
+        response = glue_client.search_tables(**kwargs)
+        for table in response['TableList']:
+            if database_names and table['DatabaseName'] not in database_names:
+                continue
+            if table_filter is not None and not table_filter(table):
+                continue
+            # The filter already runs server side, the UpdateTime check keeps the result exact
+            if table.get('UpdateTime') is not None and table['UpdateTime'] < updated_since:
+                continue
+            yield table['DatabaseName'], table
+        if not response.get('NextToken'):
+            return
+        kwargs['NextToken'] = response['NextToken']
+
+
+# Loads the high-water mark and new values digest of the last incremental crawl
+def load_crawl_state(state_file="crawl_state.json"):
+    if not os.path.exists(state_file):
+        return {}
+    with open(state_file, "r") as f:
+        return json.load(f)
+
+
+def crawl_catalog_metadata_incremental(glue_client, catalog_id=None, database_names=None,
+                                       output_file="catalog_metadata.json", max_workers=1, update_tables=False,
+                                       new_values=None, report_file="update_report.json", table_cache=None,
+                                       state_file="crawl_state.json", table_filter=None):
+    """
+    Crawl only the tables modified since the last crawl and merge them into the existing catalog metadata file.
+
+    The start time of every crawl is recorded as high-water mark in the state file. The local clock may run ahead of
+    AWS, so the next crawl starts glue_metadata_config.INCREMENTAL_CLOCK_SKEW_SECONDS before the mark: tables updated
+    in that window are crawled twice rather than missed. Without a high-water mark, an existing output file or when
+    the new values changed since the last crawl, a full catalog crawl runs instead. Dropped tables are only removed
+    from the output by a full crawl. NDJSON outputs get the records of the modified tables appended, the last record
+    of a table supersedes the earlier ones.
+
+    Parameters:
+        glue_client: Boto3 Glue client.
+        catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+        database_names (list, optional): The databases to crawl. Default is every database in the catalog.
+        output_file (str, optional): The name of the output JSON file. Default is "catalog_metadata.json".
+        max_workers (int, optional): The number of worker threads. Default is 1.
+        update_tables (bool, optional): Add or update the missing column comments of every modified table.
+        new_values (dict, optional): The new column comments, loaded from 'new_values.json' when not given.
+        report_file (str, optional): The name of the JSON file with the changed and unchanged column counts of
+            every updated table. Default is "update_report.json".
+        table_cache (TableCache, optional): Stores the modified tables in the cache.
+        state_file (str, optional): The JSON file holding the high-water mark. Default is "crawl_state.json".
+        table_filter (function, optional): Only crawl the tables selected by the filter, see make_table_filter.
+
+    Returns:
+        dict: Default values and missing columns keyed by database name and table name, empty when streamed.
+    """
+    if update_tables and new_values is None:
+        new_values = load_new_values()
+
+    crawl_start = datetime.now(timezone.utc)
+    state = load_crawl_state(state_file)
+    digest = new_values_digest(new_values) if update_tables else None
+
+    if (state.get('high_water_mark') is None or not os.path.exists(output_file)
+            or (update_tables and state.get('new_values_digest') != digest)):
+        logger.info("No usable high-water mark, running a full catalog crawl")
+        catalog_metadata = crawl_catalog_metadata(glue_client, catalog_id, database_names, output_file, max_workers,
+                                                  update_tables, new_values, report_file, table_cache, table_filter)
+    else:
+        # Streamed outputs are appended to, JSON outputs are loaded and merged
+        catalog_metadata = {}
+        writer = NdjsonWriter(output_file, append=True) if is_ndjson_output(output_file) else None
+        if writer is None:
+            with open(output_file, "r") as f:
+                catalog_metadata = json.load(f)
+
+        high_water_mark = datetime.fromisoformat(state['high_water_mark']) - timedelta(
+            seconds=glue_metadata_config.INCREMENTAL_CLOCK_SKEW_SECONDS)
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                tables = get_updated_tables(glue_client, high_water_mark, catalog_id, database_names, table_filter)
+                update_report = crawl_tables(glue_client, executor, tables, catalog_metadata, catalog_id,
+                                             update_tables, new_values, table_cache, writer=writer,
+                                             max_pending_updates=4 * max_workers,
+                                             partition_segments=get_worker_segments(max_workers))
+        finally:
+            if writer is not None:
+                writer.close()
+
+        write_catalog_outputs(None if writer else catalog_metadata, update_report if update_tables else None,
+                              output_file, report_file)
+
+    with open(state_file, 'w') as f:
+        json.dump({'high_water_mark': crawl_start.isoformat(), 'new_values_digest': digest}, f, indent=4)
+
+    return catalog_metadata
+
+
+def sync_catalog_partitions(glue_client, s3_client, catalog_id=None, database_names=None, max_workers=1,
+                            table_filter=None, delete_vanished=False, report_file="partition_report.json"):
+    """
+    Discover the Hive-style partitions of every partitioned table in S3 and sync them into the catalog.
+
+    Tables are synced in parallel on one worker pool, while their S3 prefixes are listed on a second pool, so a
+    table waiting for its listings never holds up the listings themselves.
+
+    Parameters:
+        glue_client: Boto3 Glue client.
+        s3_client: Boto3 S3 client.
+        catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+        database_names (list, optional): The databases to sync. Default is every database in the catalog.
+        max_workers (int, optional): The number of worker threads of each pool. Default is 1.
+        table_filter (function, optional): Only sync the tables selected by the filter, see make_table_filter.
+        delete_vanished (bool, optional): Delete the partitions whose S3 prefix no longer holds any object.
+            Default is False.
+        report_file (str, optional): The name of the JSON file with the discovered, created, deleted and failed
+            partition counts of every table. Default is "partition_report.json".
+
+    Returns:
+        dict: The partition counts keyed by database name and table name.
+    """
+    partition_report = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            ThreadPoolExecutor(max_workers=max_workers) as listing_executor:
+        sync_futures = {}
+        for database_name, table in get_catalog_tables_parallel(glue_client, executor, catalog_id, database_names,
+                                                                table_filter):
+            if table.get('PartitionKeys'):
+                future = executor.submit(sync_table_partitions, glue_client, s3_client, listing_executor,
+                                         database_name, table, catalog_id, delete_vanished,
+                                         get_worker_segments(max_workers))
+                sync_futures[future] = (database_name, table['Name'])
+
+        for future in as_completed(sync_futures):
+            database_name, table_name = sync_futures[future]
+            try:
+                partition_report.setdefault(database_name, {})[table_name] = future.result()
+            except Exception as e:
+                print(f" ***** Error syncing the partitions of table '{database_name}.{table_name}': {e}")
+
+    write_json(partition_report, report_file)
+    return partition_report
+
+
+def compute_location_stats(s3_client, location, max_workers=None):
+    """
+    Count the data files under a table location and sum their sizes, with a parallel S3 listing.
+
+    Parameters:
+        s3_client: Boto3 S3 client.
+        location (str): The 's3://bucket/prefix/' location of the table.
+        max_workers (int, optional): The number of key ranges listed at the same time.
+
+    Returns:
+        dict: The 'numFiles' and 'totalSize' table parameters.
+    """
+    _, prefix = parse_s3_location(location)
+    num_files = 0
+    total_size = 0
+    for obj in list_objects_parallel(s3_client, location, max_workers):
+        if is_data_file(obj['Key'], prefix):
+            num_files += 1
+            total_size += obj['Size']
+    return {'numFiles': num_files, 'totalSize': total_size}
+
+
+def get_stats_drift(parameters, stats, threshold):
+    """
+    Compare computed statistics with the table parameters.
+
+    Parameters:
+        parameters (dict): The Parameters of the table.
+        stats (dict): The computed statistics, keyed by parameter name.
+        threshold (float): The relative difference above which a statistic has drifted, for example 0.05.
+
+    Returns:
+        dict: The drifted statistics, keyed by parameter name.
+    """
+    drift = {}
+    for key, value in stats.items():
+        current = parameters.get(key)
+        if current is None or not str(current).isdigit():
+            drift[key] = value
+        elif abs(value - int(current)) > threshold * max(int(current), 1):
+            drift[key] = value
+    return drift
+
+
+def update_table_stats(glue_client, s3_client, table_context, threshold=None, listing_workers=None):
+    """
+    Write the file count and size of a table, computed from its S3 location, to its Parameters when they drifted.
+
+    The update passes the fetched VersionId and is retried after a concurrent modification, like the column
+    comment updates. recordCount cannot be derived from a listing and is left as it is.
+
+    Parameters:
+        glue_client: Boto3 Glue client.
+        s3_client: Boto3 S3 client.
+        table_context (TableContext): The fetched table.
+        threshold (float, optional): The relative difference above which a statistic is written.
+            Default is glue_metadata_config.STATS_DRIFT_THRESHOLD.
+        listing_workers (int, optional): The number of key ranges listed at the same time.
+            Default is glue_metadata_config.STATS_LISTING_WORKERS.
+
+    Returns:
+        dict: The computed 'numFiles' and 'totalSize', and whether the table was 'updated'.
+    """
+    threshold = glue_metadata_config.STATS_DRIFT_THRESHOLD if threshold is None else threshold
+    location = table_context.table.get('StorageDescriptor', {}).get('Location', '')
+    stats = compute_location_stats(s3_client, location,
+                                   listing_workers or glue_metadata_config.STATS_LISTING_WORKERS)
+
+    for attempt in range(glue_metadata_config.MAX_UPDATE_RETRIES + 1):
+        table = table_context.get_table(glue_client)
+        drift = get_stats_drift(table.get('Parameters', {}), stats, threshold)
+        if not drift:
+            return dict(stats, updated=False)
+
+        table_input = Table.from_response(table).to_table_input()
+        table_input['Parameters'] = dict(table_input.get('Parameters', {}),
+                                         **{key: str(value) for key, value in stats.items()})
+        table_input['StorageDescriptor'].pop('SchemaReference', None)
+        try:
+            glue_client.update_table(**versioned_update_kwargs(table_context, table_input))
+        except glue_client.exceptions.ConcurrentModificationException:
+            if attempt == glue_metadata_config.MAX_UPDATE_RETRIES:
+                raise
+            table_context.stale = True
+            continue
+        logger.info("Table '%s.%s' statistics updated: %s", table_context.database_name, table_context.table_name,
+                    stats)
+        return dict(stats, updated=True)
+
+
+def refresh_catalog_stats(glue_client, s3_client, catalog_id=None, database_names=None, max_workers=1,
+                          table_filter=None, threshold=None, report_file="stats_report.json"):
+    """
+    Refresh the numFiles and totalSize parameters of every table stored in S3 from parallel listings.
+
+    Glue has no batch variant of update_table, the listings and updates of the tables run concurrently on one
+    worker pool instead, and only tables whose statistics drifted beyond the threshold are written. The listing
+    threads of the concurrent tables share the S3 connection pool, see get_worker_listing_workers.
+
+    Parameters:
+        glue_client: Boto3 Glue client.
+        s3_client: Boto3 S3 client.
+        catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+        database_names (list, optional): The databases to refresh. Default is every database in the catalog.
+        max_workers (int, optional): The number of worker threads. Default is 1.
+        table_filter (function, optional): Only refresh the tables selected by the filter, see make_table_filter.
+        threshold (float, optional): The relative difference above which a statistic is written.
+            Default is glue_metadata_config.STATS_DRIFT_THRESHOLD.
+        report_file (str, optional): The name of the JSON file with the statistics of every table.
+            Default is "stats_report.json".
+
+    Returns:
+        dict: The statistics and update flag keyed by database name and table name.
+    """
+    stats_report = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        stats_futures = {}
+        for database_name, table in get_catalog_tables_parallel(glue_client, executor, catalog_id, database_names,
+                                                                table_filter):
+            if table.get('StorageDescriptor', {}).get('Location', '').startswith('s3'):
+                table_context = TableContext(database_name, table['Name'], table, catalog_id)
+                future = executor.submit(update_table_stats, glue_client, s3_client, table_context, threshold,
+                                         get_worker_listing_workers(max_workers))
+                stats_futures[future] = table_context
+
+        for future in as_completed(stats_futures):
+            table_context = stats_futures.pop(future)
+            try:
+                stats_report.setdefault(table_context.database_name, {})[table_context.table_name] = \
+                    future.result()
+            except Exception as e:
+                print(f" ***** Error refreshing the statistics of table "
+                      f"'{table_context.database_name}.{table_context.table_name}': {e}")
+
+    write_json(stats_report, report_file)
+    return stats_report
+
+
+def infer_table_schema(s3_client, metadata, bucket_name=None, object_name=None,
+                       output_file="inferred_schema.json"):
+    """
+    Infer the schema of the Parquet data of a table from the footers of sampled files and compare it with the
+    Columns of the table.
+
+    Parameters:
+        s3_client: Boto3 S3 client.
+        metadata (dict): The table metadata, as returned by get_table_metadata.
+        bucket_name (str, optional): The bucket of the data. Default is the bucket of the table location.
+        object_name (str, optional): A '.parquet' object or a prefix in the bucket. Default is the table location.
+        output_file (str, optional): The name of the output JSON file. Default is "inferred_schema.json".
+
+    Returns:
+        dict: The inferred schema, see infer_schema, and its comparison with the table Columns, see compare_columns.
+    """
+    if bucket_name and object_name and object_name.endswith('.parquet'):
+        schema = dict(infer_schema(s3_client, bucket_name, [{'Key': object_name}]),
+                      location=f"s3://{bucket_name}/{object_name}")
+    else:
+        location = f"s3://{bucket_name}/{object_name or ''}" if bucket_name else \
+            metadata.get('StorageDescriptor', {}).get('Location', '')
+        schema = infer_location_schema(s3_client, location)
+
+    schema['comparison'] = compare_columns(metadata.get('StorageDescriptor', {}).get('Columns', []),
+                                           schema['columns'])
+    schema['database_name'] = metadata.get('DatabaseName')
+    schema['table_name'] = metadata.get('Name')
+    logger.info("Schema of '%s.%s' inferred from %d files: %s", schema['database_name'], schema['table_name'],
+                schema['files'], footer_cache.stats())
+    write_json(schema, output_file, pretty=True)
+    return schema
+
+
+# Forking a process that runs thread pools can copy held locks into the child, workers start from a clean process
+def get_process_context():
+    start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(start_method)
+
+
+def detect_catalog_drift(glue_client, s3_client, catalog_id=None, database_names=None, max_workers=1,
+                         table_filter=None, processes=None, output_file="drift_report.json"):
+    """
+    Compare the Columns of every table stored in S3 with the schema of a bounded sample of its Parquet files.
+
+    The footers of the sampled files of each table are read on two thread pools, one for the tables and one for the
+    listings and ranged GETs, and are parsed and compared in a process pool, as decoding footers is CPU bound. The
+    worker processes are not forked from this threaded process, see get_process_context. When
+    the output file ends with '.ndjson' or '.jsonl', optionally followed by '.gz' or '.zst', one record per table is
+    streamed to it.
+
+    Parameters:
+        glue_client: Boto3 Glue client.
+        s3_client: Boto3 S3 client.
+        catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+        database_names (list, optional): The databases to check. Default is every database in the catalog.
+        max_workers (int, optional): The number of worker threads of each thread pool. Default is 1.
+        table_filter (function, optional): Only check the tables selected by the filter, see make_table_filter.
+        processes (int, optional): The number of worker processes. Default is one per CPU.
+        output_file (str, optional): The name of the output file. Default is "drift_report.json".
+
+    Returns:
+        dict: The drift record of every table keyed by database name and table name, empty when streamed.
+    """
+    drift_report = {}
+    writer = NdjsonWriter(output_file) if is_ndjson_output(output_file) else None
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+                ThreadPoolExecutor(max_workers=max_workers) as io_executor, \
+                ProcessPoolExecutor(max_workers=processes, mp_context=get_process_context()) as process_executor:
+            footer_futures = {}
+            for database_name, table in get_catalog_tables_parallel(glue_client, executor, catalog_id,
+                                                                    database_names, table_filter):
+                if table.get('StorageDescriptor', {}).get('Location', '').startswith('s3'):
+                    future = executor.submit(collect_table_footers, glue_client, s3_client, io_executor,
+                                             database_name, table, catalog_id,
+                                             total_segments=get_worker_segments(max_workers))
+                    footer_futures[future] = (database_name, table)
+
+            drift_futures = {}
+            for future in as_completed(footer_futures):
+                database_name, table = footer_futures.pop(future)
+                try:
+                    sample = future.result()
+                except Exception as e:
+                    print(f" ***** Error sampling the files of table '{database_name}.{table['Name']}': {e}")
+                    continue
+                drift_future = process_executor.submit(
+                    build_drift_record, database_name, table['Name'], table['StorageDescriptor'].get('Columns', []),
+                    [partition_key['Name'] for partition_key in table.get('PartitionKeys', [])],
+                    sample['locations'], sample['footers'], sample['footer_bytes'])
+                drift_futures[drift_future] = (database_name, table['Name'])
+
+            for future in as_completed(drift_futures):
+                database_name, table_name = drift_futures.pop(future)
+                try:
+                    record, parsed = future.result()
+                except Exception as e:
+                    print(f" ***** Error comparing the schema of table '{database_name}.{table_name}': {e}")
+                    continue
+                for (bucket, key, etag), footer in parsed.items():
+                    footer_cache.put(bucket, key, etag, footer)
+                if writer is not None:
+                    writer.write(record)
+                else:
+                    drift_report.setdefault(database_name, {})[table_name] = record
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        write_json(drift_report, output_file)
+    return drift_report
+
+
+# Loads the new column comments keyed by column name
+def load_new_values(file_name="new_values.json"):
+    with open(file_name, "r") as json_file:
+        return json.load(json_file)
+
+
+# Indexes the column comments of a table by column name, the first column of a name wins
+def get_column_comments(metadata):
+    comments = {}
+    for col in metadata['StorageDescriptor']['Columns']:
+        comments.setdefault(col['Name'], col.get('Comment', ''))
+    return comments
+
+
+def diff_column_comments(current_comments, columns):
+    """
+    Compare the desired column comments with the current ones.
+
+    Parameters:
+        current_comments (dict): The current column comments keyed by column name, see get_column_comments.
+        columns (list): The desired columns of the table.
+
+    Returns:
+        dict: The number of 'changed' and 'unchanged' columns.
+    """
+    changed = sum(1 for col in columns if col.get('Comment', '') != current_comments.get(col['Name'], ''))
+    return {'changed': changed, 'unchanged': len(columns) - changed}
+
+
+def get_missing_column_comments(metadata, existing_metadata):
+    """
+    Find the columns with an empty 'Comment' and their comment in the current table metadata.
+
+    Parameters:
         metadata (dict): A dictionary containing the metadata.
+        existing_metadata (dict): The current table metadata in the Glue Data Catalog.
 
     Returns:
-        dict: A dictionary containing the updated missing columns and inherited properties.
+        dict: The existing comment of every column with an empty 'Comment', keyed by column name.
     """
-    # Fetch the existing table metadata
-    response = glue_client.get_table(DatabaseName=database_name, Name=table_name)
-    existing_metadata = response['Table']
+    existing_comments = get_column_comments(existing_metadata)
 
-    # Get the columns with empty 'Comment' values
     missing_columns = {}
     for col in metadata['StorageDescriptor']['Columns']:
-        comment = col.get('Comment', '')
-        if comment == '':
-            # Extract the existing comment from the current table metadata
-            for existing_col in existing_metadata['StorageDescriptor']['Columns']:
-                if existing_col['Name'] == col['Name']:
-                    missing_columns[col['Name']] = existing_col.get('Comment', '')
-                    break
+        if col.get('Comment', '') == '' and col['Name'] in existing_comments:
+            missing_columns[col['Name']] = existing_comments[col['Name']]
+    return missing_columns
+
+
+def apply_new_column_comments(metadata, missing_columns, new_values):
+    """
+    Update the comment of every missing column with its new value.
+
+    Parameters:
+        metadata (dict): A dictionary containing the metadata, updated in place.
+        missing_columns (dict): The existing comment of every missing column, keyed by column name.
+        new_values (dict): The new column comments keyed by column name.
+
+    Returns:
+        None
+    """
+    # One pass over the columns, looking up each name in the missing columns and new values dictionaries
+    for col in metadata['StorageDescriptor']['Columns']:
+        name = col['Name']
+        if name in missing_columns:
+            col['Comment'] = new_values[name] if name in new_values else missing_columns[name]
+
+
+def build_table_input(table_name, existing_metadata, columns):
+    """
+    Build the TableInput of update_table from the existing table metadata and the updated columns.
+
+    Every attribute update_table accepts is kept, such as the PartitionKeys, Owner and view texts, so the update
+    only changes the columns.
+
+    Parameters:
+        table_name (str): The name of the table.
+        existing_metadata (dict): The current table metadata in the Glue Data Catalog.
+        columns (list): The updated columns of the table.
+
+    Returns:
+        dict: The TableInput with only the valid parameters.
+    """
+    # Prepare the updated TableInput parameter with the new column values
+    # The compact table copies the StorageDescriptor, so the fetched table metadata is left untouched
+    table_input = Table.from_response(existing_metadata).to_table_input(columns)
+    table_input['Name'] = table_name
+    table_input['StorageDescriptor'].pop('SchemaReference', None)  # Remove the SchemaReference
+    return table_input
+
+
+class TableContext:
+    """
+    A table fetched once from the AWS Glue Data Catalog, carried with its VersionId through analysis and update.
+
+    The update step reuses the fetched table and only fetches it again when the context is stale.
+    """
+
+    def __init__(self, database_name, table_name, table, catalog_id=None):
+        """
+        Parameters:
+            database_name (str): The name of the database where the table resides.
+            table_name (str): The name of the table.
+            table (dict): The 'Table' returned by get_table or an entry of the 'TableList' of get_tables.
+            catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+        """
+        self.database_name = database_name
+        self.table_name = table_name
+        self.catalog_id = catalog_id
+        self.stale = False
+        self.update_report = None  # The changed and unchanged column counts of the last update
+        self.set_table(table)
+
+    def set_table(self, table):
+        """Replace the fetched table, for example after fetching it again."""
+        self.table = table
+        self.version_id = table.get('VersionId')
+        self.stale = False
+
+    def is_stale(self, metadata=None):
+        """
+        Check whether the fetched table must be fetched again before updating it.
+
+        Parameters:
+            metadata (dict, optional): The table metadata analyzed by the caller, stale when its VersionId differs.
+
+        Returns:
+            bool: True when the context was marked stale or the analyzed metadata has another version.
+        """
+        if self.stale:
+            return True
+        version_id = metadata.get('VersionId') if metadata else None
+        return version_id is not None and self.version_id is not None and version_id != self.version_id
+
+    def get_table(self, glue_client, metadata=None):
+        """
+        Return the fetched table, fetching it again with get_table only if it is stale.
+
+        Parameters:
+            glue_client: Boto3 Glue client.
+            metadata (dict, optional): The table metadata analyzed by the caller.
+
+        Returns:
+            dict: The current table metadata.
+        """
+        if self.is_stale(metadata):
+            response = glue_client.get_table(DatabaseName=self.database_name, Name=self.table_name,
+                                             **catalog_id_kwargs(self.catalog_id))
+            self.set_table(response['Table'])
+        return self.table
+
+
+# Fetches a table once and wraps it in a TableContext
+def fetch_table_context(glue_client, database_name, table_name, catalog_id=None):
+    response = glue_client.get_table(DatabaseName=database_name, Name=table_name, **catalog_id_kwargs(catalog_id))
+    return TableContext(database_name, table_name, response['Table'], catalog_id)
+
+
+def prepare_column_comment_update(table_context, metadata, new_values=None):
+    """
+    Merge the new column comments into the metadata and build the TableInput of its update.
+
+    Parameters:
+        table_context (TableContext): The fetched table, its update_report is set to the changed and unchanged
+            column counts.
+        metadata (dict): A dictionary containing the metadata, updated in place.
+        new_values (dict, optional): The new column comments, loaded from 'new_values.json' when not given.
+
+    Returns:
+        tuple: The TableInput of update_table, or None when nothing changes, and the result returned by
+            add_update_and_inherit_properties.
+    """
+    existing_metadata = table_context.table
+
+    # Get the columns with empty 'Comment' values
+    missing_columns = get_missing_column_comments(metadata, existing_metadata)
 
     if not missing_columns:
+        table_context.update_report = {'changed': 0, 'unchanged': len(metadata['StorageDescriptor']['Columns'])}
         print("No missing columns with empty 'Comment' found.")
-        return {}
+        return None, {}
 
     # Update the missing columns with their new values from the external JSON file
-    with open("new_values.json", "r") as json_file:
-        new_values = json.load(json_file)
+    if new_values is None:
+        new_values = load_new_values()
 
-    for column, new_comment in missing_columns.items():
-        if column in new_values:
-            new_comment = new_values[column]
+    # The current comments are taken before applying the new values, the metadata may be the fetched table itself
+    current_comments = get_column_comments(existing_metadata)
+    apply_new_column_comments(metadata, missing_columns, new_values)
 
-        # Update the value of the missing column
-        for col in metadata['StorageDescriptor']['Columns']:
-            if col['Name'] == column:
-                col['Comment'] = new_comment
+    # Skip the update when no comment changes, every update_table call creates a new table version
+    table_context.update_report = diff_column_comments(current_comments, metadata['StorageDescriptor']['Columns'])
+    logger.info("Table '%s.%s': %d changed and %d unchanged columns", table_context.database_name,
+                table_context.table_name, table_context.update_report['changed'],
+                table_context.update_report['unchanged'])
+    if not table_context.update_report['changed']:
+        print("No column comment changes found, update skipped.")
+        return None, metadata
 
-    # Prepare the updated TableInput parameter with the new column values
-    updated_metadata = existing_metadata.copy()
-    updated_metadata['StorageDescriptor']['Columns'] = metadata['StorageDescriptor']['Columns']
-
-    # Remove attributes that should not be updated
-    updated_metadata.pop('CreateTime', None)
-    updated_metadata.pop('UpdateTime', None)
-    updated_metadata.pop('CreatedBy', None)
-    updated_metadata.pop('IsRegisteredWithLakeFormation', None)
-    updated_metadata.pop('CatalogId', None)
-    updated_metadata.pop('VersionId', None)
-    updated_metadata['StorageDescriptor'].pop('SchemaReference', None)  # Remove the SchemaReference
-
-    # Prepare the updated TableInput with only the valid parameters
-    table_input = {
-        'Name': table_name,
-        'Description': existing_metadata.get('Description', ''),
-        'TableType': existing_metadata.get('TableType', ''),
-        'Parameters': existing_metadata.get('Parameters', {}),
-        'StorageDescriptor': updated_metadata['StorageDescriptor']
-    }
-
-    # Update the table in Glue Data Catalog with the new column values
-    glue_client.update_table(DatabaseName=database_name, TableInput=table_input)
-
-    print("****** Missing column values and other properties updated successfully! ******")
-    return metadata
+    table_input = build_table_input(table_context.table_name, existing_metadata,
+                                    metadata['StorageDescriptor']['Columns'])
+    return table_input, metadata
+
+
+# Builds the update_table arguments that only succeed if the table is still at the fetched VersionId
+def versioned_update_kwargs(table_context, table_input):
+    kwargs = dict(DatabaseName=table_context.database_name, TableInput=table_input,
+                  **catalog_id_kwargs(table_context.catalog_id))
+    if table_context.version_id is not None:
+        kwargs['VersionId'] = table_context.version_id
+    return kwargs
+
+
+def add_update_and_inherit_properties(glue_client, database_name, table_name, metadata, new_values=None,
+                                      table_context=None, propagate_partitions=None, partition_segments=None):
+    """
+    Add or update missing column comments and inherit other properties in AWS Glue table's metadata.
+
+    The update passes the fetched VersionId. When the table was modified concurrently, the table is fetched again,
+    its columns are merged again and the update is retried, up to glue_metadata_config.MAX_UPDATE_RETRIES times.
+    Optionally, the column comments of the table are then copied to the columns of its partitions.
+
+    Parameters:
+        glue_client: Boto3 Glue client.
+        database_name (str): The name of the database where the table resides.
+        table_name (str): The name of the table for which to update missing values.
+        metadata (dict): A dictionary containing the metadata.
+        new_values (dict, optional): The new column comments, loaded from 'new_values.json' when not given.
+        table_context (TableContext, optional): The already fetched table. The table is fetched again only when
+            it is not given or stale.
+        propagate_partitions (bool, optional): Copy the column comments to the partitions of the table, their
+            counts are added to the update report. Default is glue_metadata_config.PROPAGATE_PARTITION_COMMENTS.
+        partition_segments (int, optional): The number of parallel segments of the partition scan, see
+            get_worker_segments when tables are updated concurrently.
+
+    Returns:
+        dict: A dictionary containing the updated missing columns and inherited properties.
+    """
+    if propagate_partitions is None:
+        propagate_partitions = glue_metadata_config.PROPAGATE_PARTITION_COMMENTS
+
+    # Fetch the existing table metadata, unless it was already fetched
+    if table_context is None:
+        table_context = fetch_table_context(glue_client, database_name, table_name)
+
+    for attempt in range(glue_metadata_config.MAX_UPDATE_RETRIES + 1):
+        existing_metadata = table_context.get_table(glue_client, metadata)
+        if metadata is None:
+            # Merge again from the table fetched after the concurrent modification
+            metadata = existing_metadata
+
+        table_input, result = prepare_column_comment_update(table_context, metadata, new_values)
+        if table_input is None:
+            # The table already carries the comments, its partitions may not
+            if propagate_partitions:
+                propagate_partition_comments(glue_client, table_context, existing_metadata, partition_segments)
+            return result
+
+        # Update the table in Glue Data Catalog with the new column values
+        try:
+            glue_client.update_table(**versioned_update_kwargs(table_context, table_input))
+        except glue_client.exceptions.ConcurrentModificationException:
+            if attempt == glue_metadata_config.MAX_UPDATE_RETRIES:
+                raise
+            logger.warning("Table '%s.%s' was modified concurrently, merging its columns again (retry %d)",
+                           database_name, table_name, attempt + 1)
+            table_context.stale = True
+            metadata = None
+            continue
+
+        # The update created a new table version, the fetched table is outdated
+        table_context.stale = True
+        print("****** Missing column values and other properties updated successfully! ******")
+        if propagate_partitions:
+            propagate_partition_comments(glue_client, table_context, table_input, partition_segments)
+        return result
+
+
+# Copies the column comments of a partitioned table to its partitions and adds their counts to the update report
+def propagate_partition_comments(glue_client, table_context, table, total_segments=None):
+    if not table.get('PartitionKeys') or 'StorageDescriptor' not in table:
+        return
+    partition_report = propagate_column_comments(glue_client, table_context.database_name,
+                                                 table_context.table_name, table['StorageDescriptor']['Columns'],
+                                                 table_context.catalog_id, total_segments)
+    if table_context.update_report is not None:
+        table_context.update_report['partitions'] = partition_report
 
 
 def main():
+    table_cache = None
     try:
         access_key, secret_key, region_name, bucket_name, database_name, catalog_id, object_name, table_name = get_aws_token()
 
@@ -246,8 +1219,67 @@ def main():
         # Login to AWS Glue
         glue_client = login_to_aws_glue()
 
+        table_filter = make_table_filter(glue_metadata_config.CRAWL_TABLE_NAME_PATTERN,
+                                         glue_metadata_config.CRAWL_TABLE_TYPES)
+
+        if glue_metadata_config.TABLE_CACHE_ENABLED and glue_metadata_config.CRAWL_MODE in ('catalog', 'incremental'):
+            table_cache = TableCache()
+
+        # Crawl every table of the configured databases instead of a single table
+        if glue_metadata_config.CRAWL_MODE == 'catalog':
+            crawl_catalog_metadata(glue_client, catalog_id, glue_metadata_config.CRAWL_DATABASES,
+                                   output_file=glue_metadata_config.CATALOG_OUTPUT_FILE,
+                                   max_workers=glue_metadata_config.MAX_WORKERS,
+                                   update_tables=glue_metadata_config.CATALOG_UPDATE,
+                                   report_file=glue_metadata_config.CATALOG_UPDATE_REPORT_FILE,
+                                   table_cache=table_cache, table_filter=table_filter)
+            return
+
+        # Crawl only the tables modified since the last crawl
+        if glue_metadata_config.CRAWL_MODE == 'incremental':
+            crawl_catalog_metadata_incremental(
+                glue_client, catalog_id, glue_metadata_config.CRAWL_DATABASES,
+                output_file=glue_metadata_config.CATALOG_OUTPUT_FILE,
+                max_workers=glue_metadata_config.MAX_WORKERS,
+                update_tables=glue_metadata_config.CATALOG_UPDATE,
+                report_file=glue_metadata_config.CATALOG_UPDATE_REPORT_FILE,
+                table_cache=table_cache,
+                state_file=glue_metadata_config.INCREMENTAL_STATE_FILE,
+                table_filter=table_filter)
+            return
+
+        # Register the partitions found in S3 under the table locations of the configured databases
+        if glue_metadata_config.CRAWL_MODE == 'partitions':
+            sync_catalog_partitions(glue_client, s3_client, catalog_id, glue_metadata_config.CRAWL_DATABASES,
+                                    max_workers=glue_metadata_config.MAX_WORKERS, table_filter=table_filter,
+                                    delete_vanished=glue_metadata_config.DELETE_VANISHED_PARTITIONS,
+                                    report_file=glue_metadata_config.PARTITION_REPORT_FILE)
+            return
+
+        # Refresh the file count and size parameters of the tables of the configured databases
+        if glue_metadata_config.CRAWL_MODE == 'stats':
+            refresh_catalog_stats(glue_client, s3_client, catalog_id, glue_metadata_config.CRAWL_DATABASES,
+                                  max_workers=glue_metadata_config.MAX_WORKERS, table_filter=table_filter,
+                                  report_file=glue_metadata_config.STATS_REPORT_FILE)
+            return
+
+        # Compare the columns of the tables of the configured databases with the schema of their data
+        if glue_metadata_config.CRAWL_MODE == 'drift':
+            detect_catalog_drift(glue_client, s3_client, catalog_id, glue_metadata_config.CRAWL_DATABASES,
+                                 max_workers=glue_metadata_config.MAX_WORKERS, table_filter=table_filter,
+                                 processes=glue_metadata_config.DRIFT_PROCESSES,
+                                 output_file=glue_metadata_config.DRIFT_REPORT_FILE)
+            return
+
         # Get table metadata
-        default_table_metadata = get_table_metadata(database_name, table_name)
+        default_table_metadata = get_table_metadata(database_name, table_name, glue_client)
+
+        # Infer the schema of the table data from Parquet footers instead of updating the table
+        if glue_metadata_config.CRAWL_MODE == 'schema':
+            if default_table_metadata is not None:
+                infer_table_schema(s3_client, default_table_metadata, bucket_name, object_name,
+                                   output_file=glue_metadata_config.SCHEMA_INFERENCE_FILE)
+            return
 
         """
         Writes metadata and missing columns to a JSON output file
@@ -255,14 +1287,22 @@ def main():
         Comment below code block to list all the default values from  particular table mentioned in config file
         Run below code to add or update missing column comment values for particular table mentioned in config file
         """
+        table_context = TableContext(database_name, table_name, default_table_metadata, catalog_id)
         update_table_metadata = add_update_and_inherit_properties(glue_client, database_name, table_name,
-                                                                  default_table_metadata)
+                                                                  default_table_metadata, table_context=table_context)
 
         write_metadata_and_missing_values(update_table_metadata, update_table_metadata.get('missing_columns', {}),
                                           output_file="updated_metadata.json")
 
     except Exception as e:
         logging.exception("An error occurred: %s", str(e))
+    finally:
+        logger.debug("Client registry stats: %s", client_registry.stats())
+        logger.info("Rate limiter stats: %s", rate_limiter.stats())
+        if glue_metadata_config.RANGE_CACHE_ENABLED:
+            logger.info("Range cache stats: %s", get_range_cache().stats())
+        if table_cache is not None:
+            table_cache.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,156 @@
+import logging
+
+import glue_metadata_config
+from glue_metadata_parquet import compare_columns, footer_cache, merge_columns, parse_footer, read_footer, \
+    sample_objects
+from glue_metadata_partitions import PartitionScan
+from glue_metadata_s3 import is_data_file, parse_s3_location
+
+logger = logging.getLogger(__name__)
+
+# Keys listed per partition before sampling, one list_objects_v2 page
+MAX_LISTED_KEYS = 1000
+
+
+def sample_location_files(s3_client, location, max_files):
+    """
+    Sample the data files directly or indirectly under a location, from the first page of its listing.
+
+    Parameters:
+        s3_client: Boto3 S3 client.
+        location (str): The 's3://bucket/prefix/' location of a partition or an unpartitioned table.
+        max_files (int): The number of files sampled, spread evenly over the listed keys.
+
+    Returns:
+        list: The (bucket, object) tuples of the sampled files.
+    """
+    bucket, prefix = parse_s3_location(location)
+    response = s3_client.list_objects_v2(Bucket=bucket, Prefix=prefix, MaxKeys=MAX_LISTED_KEYS)
+    objects = [obj for obj in response.get('Contents', []) if is_data_file(obj['Key'], prefix)]
+    return [(bucket, obj) for obj in sample_objects(objects, max_files)]
+
+
+def get_sampled_locations(glue_client, database_name, table, catalog_id=None, max_partitions=None,
+                          total_segments=None):
+    """
+    Return the locations sampled for a table: its location, or the locations of a sample of its partitions.
+
+    Parameters:
+        glue_client: Boto3 Glue client.
+        database_name (str): The name of the database where the table resides.
+        table (dict): The table, as returned by get_table.
+        catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+        max_partitions (int, optional): The number of partitions sampled, spread evenly over the partitions in
+            location order. Default is glue_metadata_config.DRIFT_MAX_PARTITIONS.
+        total_segments (int, optional): The number of parallel segments of the partition scan.
+
+    Returns:
+        list: The S3 locations.
+    """
+    if not table.get('PartitionKeys'):
+        return [table['StorageDescriptor']['Location']]
+    locations = sorted({partition['StorageDescriptor']['Location']
+                        for partition in PartitionScan(glue_client, database_name, table['Name'], catalog_id,
+                                                       exclude_column_schema=True, total_segments=total_segments)
+                        if partition.get('StorageDescriptor', {}).get('Location', '').startswith('s3')})
+    return sample_objects(locations, max_partitions or glue_metadata_config.DRIFT_MAX_PARTITIONS)
+
+
+def collect_table_footers(glue_client, s3_client, executor, database_name, table, catalog_id=None,
+                          files_per_partition=None, max_partitions=None, cache=footer_cache, total_segments=None):
+    """
+    Read the footers of a bounded sample of the Parquet files of a table.
+
+    The sampled locations are listed and the footers read on the executor, which must not be the pool running this
+    function. Footers found in the cache are returned parsed, the others as bytes, to be parsed by the caller.
+
+    Parameters:
+        glue_client: Boto3 Glue client.
+        s3_client: Boto3 S3 client, shared by all workers.
+        executor (ThreadPoolExecutor): The worker pool running the listings and the ranged GETs.
+        database_name (str): The name of the database where the table resides.
+        table (dict): The table, as returned by get_table.
+        catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+        files_per_partition (int, optional): The files sampled per location.
+            Default is glue_metadata_config.DRIFT_FILES_PER_PARTITION.
+        max_partitions (int, optional): The partitions sampled, see get_sampled_locations.
+        cache (FooterCache, optional): The footer cache, None disables caching. Default is the shared cache.
+        total_segments (int, optional): The number of parallel segments of the partition scan, see
+            get_worker_segments when tables are sampled concurrently.
+
+    Returns:
+        dict: The number of sampled 'locations', the parsed 'footers' and the unparsed 'footer_bytes', both keyed
+            by (bucket, key, ETag).
+    """
+    files_per_partition = files_per_partition or glue_metadata_config.DRIFT_FILES_PER_PARTITION
+    locations = get_sampled_locations(glue_client, database_name, table, catalog_id, max_partitions, total_segments)
+    listing_futures = [executor.submit(sample_location_files, s3_client, location, files_per_partition)
+                       for location in locations]
+
+    footers = {}
+    footer_futures = {}
+    for future in listing_futures:
+        for bucket, obj in future.result():
+            footer = cache.get(bucket, obj['Key'], obj.get('ETag')) if cache is not None else None
+            if footer is not None:
+                footers[(bucket, obj['Key'], obj.get('ETag'))] = footer
+            else:
+                footer_futures[executor.submit(read_footer, s3_client, bucket, obj['Key'], obj.get('ETag'))] = \
+                    (bucket, obj['Key'])
+
+    footer_bytes = {}
+    for future, (bucket, key) in footer_futures.items():
+        try:
+            data, etag = future.result()
+        except Exception as e:
+            logger.warning("Footer of 's3://%s/%s' not read: %s", bucket, key, e)
+            continue
+        # Copied out of the range cache mapping, the bytes are sent to a worker process
+        footer_bytes[(bucket, key, etag)] = bytes(data)
+    return {'locations': len(locations), 'footers': footers, 'footer_bytes': footer_bytes}
+
+
+def build_drift_record(database_name, table_name, columns, partition_keys, locations, footers, footer_bytes):
+    """
+    Compare the columns of a table with the columns of its sampled footers.
+
+    Runs in a worker process: the footers read as bytes are parsed here and returned, so the caller can cache them.
+
+    Parameters:
+        database_name (str): The name of the database where the table resides.
+        table_name (str): The name of the table.
+        columns (list): The Columns of the table.
+        partition_keys (list): The names of the partition keys, not reported as missing in Glue when a file
+            carries them.
+        locations (int): The number of sampled locations.
+        footers (dict): The parsed footers, keyed by (bucket, key, ETag).
+        footer_bytes (dict): The unparsed footers, keyed by (bucket, key, ETag).
+
+    Returns:
+        tuple: The drift record of the table and the footers parsed from bytes, keyed by (bucket, key, ETag).
+    """
+    parsed = {}
+    for footer_key, data in footer_bytes.items():
+        try:
+            parsed[footer_key] = parse_footer(data)
+        except Exception as e:
+            logger.warning("Footer of 's3://%s/%s' not parsed: %s", footer_key[0], footer_key[1], e)
+    all_footers = {**footers, **parsed}
+    data_columns, conflicts = merge_columns(all_footers[footer_key] for footer_key in sorted(all_footers))
+
+    partition_key_names = {name.lower() for name in partition_keys}
+    comparison = compare_columns(columns, [column for column in data_columns
+                                           if column['Name'].lower() not in partition_key_names])
+    if not all_footers:
+        # Without a readable file there is nothing to compare the Glue columns with
+        comparison['missing_in_data'] = []
+    record = {
+        'database': database_name,
+        'table': table_name,
+        'locations_sampled': locations,
+        'files_sampled': len(all_footers),
+        **comparison,
+        'type_conflicts': conflicts,
+        'has_drift': any(comparison.values()) or bool(conflicts)
+    }
+    return record, parsed
@@ -0,0 +1,281 @@
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+
+import glue_metadata_config
+
+# Table attributes kept as they are, in the order of the Glue Table shape, keyed by response key
+TABLE_ATTRIBUTES = {
+    'Name': 'name',
+    'DatabaseName': 'database_name',
+    'Description': 'description',
+    'Owner': 'owner',
+    'CreateTime': 'create_time',
+    'UpdateTime': 'update_time',
+    'LastAccessTime': 'last_access_time',
+    'LastAnalyzedTime': 'last_analyzed_time',
+    'Retention': 'retention',
+    'ViewOriginalText': 'view_original_text',
+    'ViewExpandedText': 'view_expanded_text',
+    'TableType': 'table_type',
+    'TargetTable': 'target_table',
+    'CatalogId': 'catalog_id',
+    'VersionId': 'version_id',
+    'FederatedTable': 'federated_table',
+    'ViewDefinition': 'view_definition'
+}
+
+# The keys of the Glue TableInput shape accepted by update_table
+TABLE_INPUT_KEYS = (
+    'Name', 'Description', 'Owner', 'LastAccessTime', 'LastAnalyzedTime', 'Retention', 'StorageDescriptor',
+    'PartitionKeys', 'ViewOriginalText', 'ViewExpandedText', 'TableType', 'Parameters', 'TargetTable',
+    'FederatedTable', 'ViewDefinition'
+)
+
+
+# Interns a string, so equal column names, types and parameter keys are stored once across tables
+def intern_string(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+# Interns the keys of a parameters map, the values are mostly distinct
+def intern_parameters(parameters):
+    if parameters is None:
+        return None
+    return {intern_string(key): value for key, value in parameters.items()}
+
+
+class Column:
+    """
+    Compact column of a table, with interned name and type.
+    """
+    __slots__ = ('name', 'type', 'comment', 'parameters')
+
+    def __init__(self, name, type=None, comment=None, parameters=None):
+        self.name = name
+        self.type = type
+        self.comment = comment
+        self.parameters = parameters
+
+    @classmethod
+    def from_dict(cls, column):
+        """Build a column from an entry of the 'Columns' or 'PartitionKeys' of a Glue table."""
+        return cls(intern_string(column['Name']), intern_string(column.get('Type')), column.get('Comment'),
+                   intern_parameters(column.get('Parameters')))
+
+    def to_dict(self):
+        """Return the column as a Glue Column, with the keys that were present when it was built."""
+        column = {'Name': self.name}
+        if self.type is not None:
+            column['Type'] = self.type
+        if self.comment is not None:
+            column['Comment'] = self.comment
+        if self.parameters is not None:
+            column['Parameters'] = self.parameters
+        return column
+
+
+def columns_from_dicts(columns):
+    return None if columns is None else tuple(Column.from_dict(column) for column in columns)
+
+
+def columns_to_dicts(columns):
+    return None if columns is None else [column.to_dict() for column in columns]
+
+
+# Serializes a sub-document with sorted keys, equal documents give the same text
+def canonical_json(document):
+    return json.dumps(document, sort_keys=True, separators=(',', ':'), default=str)
+
+
+# Fingerprints a sub-document from its canonical JSON, equal documents get the same digest
+def document_digest(document):
+    return hashlib.sha256(canonical_json(document).encode()).hexdigest()
+
+
+class DescriptorPool:
+    """
+    Hash-consing pool of StorageDescriptor sub-documents.
+
+    Tables created from the same template, and the partitions of a table, carry byte-for-byte identical column
+    lists and descriptors (SerdeInfo, formats, parameters). The pool hands out one shared instance per distinct
+    sub-document, so each is held in memory once. Shared sub-documents must not be modified. The pool keeps the
+    most recently used documents only, so its memory stays bounded on catalogs with varied schemas.
+    """
+
+    def __init__(self, max_documents=None):
+        """
+        Parameters:
+            max_documents (int, optional): The number of distinct documents kept for sharing. Default is
+                glue_metadata_config.DESCRIPTOR_POOL_SIZE.
+        """
+        self.max_documents = max_documents or glue_metadata_config.DESCRIPTOR_POOL_SIZE
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def share(self, document):
+        """
+        Return the shared instance of a document, for example a StorageDescriptor without its columns.
+
+        Parameters:
+            document (dict): The document to share.
+
+        Returns:
+            dict: The first equal document given to the pool.
+        """
+        return self._share(('document', document_digest(document)), document)
+
+    def share_columns(self, columns):
+        """
+        Return the shared instance of a column tuple.
+
+        Parameters:
+            columns (tuple): Compact columns, see columns_from_dicts.
+
+        Returns:
+            tuple: The first equal column tuple given to the pool.
+        """
+        return self._share(('columns', document_digest([
+            (column.name, column.type, column.comment, column.parameters) for column in columns])), columns)
+
+    def stats(self):
+        """
+        Returns:
+            dict: The number of lookups, the lookups answered with a shared instance, the distinct documents kept
+                and the documents evicted.
+        """
+        with self._lock:
+            return {'lookups': self.lookups, 'hits': self.hits, 'documents': len(self._documents),
+                    'evictions': self.evictions}
+
+    def _share(self, key, document):
+        with self._lock:
+            self.lookups += 1
+            shared = self._documents.setdefault(key, document)
+            self._documents.move_to_end(key)
+            if shared is not document:
+                self.hits += 1
+            while len(self._documents) > self.max_documents:
+                # Tables holding an evicted document keep it alive, later tables no longer share it
+                self._documents.popitem(last=False)
+                self.evictions += 1
+            return shared
+
+
+class Table:
+    """
+    Compact table of the Glue Data Catalog, holding its attributes in slots instead of the boto3 response dict.
+
+    Column names, types and parameter keys are interned. The columns and the Location are held apart from the
+    rest of the StorageDescriptor, so both can be shared through a DescriptorPool. Attributes the model does not
+    know are kept in `extra`, so converting back to a response dict or to a TableInput loses nothing.
+    """
+    __slots__ = tuple(TABLE_ATTRIBUTES.values()) + ('storage_descriptor', 'location', 'columns', 'partition_keys',
+                                                     'parameters', 'extra')
+
+    def __init__(self, **attributes):
+        for attribute in self.__slots__:
+            setattr(self, attribute, attributes.get(attribute))
+
+    @classmethod
+    def from_response(cls, table, pool=None):
+        """
+        Build a compact table.
+
+        Parameters:
+            table (dict): The 'Table' returned by get_table or an entry of the 'TableList' of get_tables.
+            pool (DescriptorPool, optional): Shares the columns and descriptor with the other tables of the pool.
+
+        Returns:
+            Table: The compact table.
+        """
+        model = cls()
+        extra = {}
+        for key, value in table.items():
+            attribute = TABLE_ATTRIBUTES.get(key)
+            if attribute is not None:
+                setattr(model, attribute, value)
+            elif key == 'StorageDescriptor':
+                storage_descriptor = dict(value)
+                model.columns = columns_from_dicts(storage_descriptor.pop('Columns', None))
+                model.location = storage_descriptor.pop('Location', None)
+                if pool is not None:
+                    storage_descriptor = pool.share(storage_descriptor)
+                    if model.columns is not None:
+                        model.columns = pool.share_columns(model.columns)
+                model.storage_descriptor = storage_descriptor
+            elif key == 'PartitionKeys':
+                model.partition_keys = columns_from_dicts(value)
+            elif key == 'Parameters':
+                model.parameters = intern_parameters(value)
+            else:
+                extra[key] = value
+        model.name = intern_string(model.name)
+        model.database_name = intern_string(model.database_name)
+        model.table_type = intern_string(model.table_type)
+        model.extra = extra or None
+        return model
+
+    def get_storage_descriptor(self):
+        """Return the StorageDescriptor with its columns, or None when the table has none."""
+        if self.storage_descriptor is None:
+            return None
+        storage_descriptor = {}
+        if self.columns is not None:
+            storage_descriptor['Columns'] = columns_to_dicts(self.columns)
+        if self.location is not None:
+            storage_descriptor['Location'] = self.location
+        storage_descriptor.update(self.storage_descriptor)
+        return storage_descriptor
+
+    def to_response(self):
+        """
+        Return the table as the dictionary it was built from.
+
+        Returns:
+            dict: The table in the format of the 'Table' returned by get_table.
+        """
+        table = {}
+        for key, attribute in TABLE_ATTRIBUTES.items():
+            value = getattr(self, attribute)
+            if value is not None:
+                table[key] = value
+        if self.storage_descriptor is not None:
+            table['StorageDescriptor'] = self.get_storage_descriptor()
+        if self.partition_keys is not None:
+            table['PartitionKeys'] = columns_to_dicts(self.partition_keys)
+        if self.parameters is not None:
+            table['Parameters'] = self.parameters
+        if self.extra is not None:
+            table.update(self.extra)
+        return table
+
+    def to_table_input(self, columns=None):
+        """
+        Build the TableInput of update_table, keeping every attribute update_table accepts.
+
+        Parameters:
+            columns (list, optional): The updated columns of the table. Default is the current columns.
+
+        Returns:
+            dict: The TableInput.
+        """
+        table = self.to_response()
+        if columns is not None:
+            table['StorageDescriptor'] = dict(table.get('StorageDescriptor') or {}, Columns=columns)
+        table_input = {key: table[key] for key in TABLE_INPUT_KEYS if key in table}
+        if 'ViewDefinition' in table_input:
+            # The representations of a ViewDefinitionInput do not carry the IsStale flag of the response
+            view_definition = dict(table_input['ViewDefinition'])
+            if 'Representations' in view_definition:
+                view_definition['Representations'] = [
+                    {key: value for key, value in representation.items() if key != 'IsStale'}
+                    for representation in view_definition['Representations']
+                ]
+            table_input['ViewDefinition'] = view_definition
+        return table_input
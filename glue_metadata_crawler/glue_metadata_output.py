@@ -0,0 +1,181 @@
+import gzip
+import json
+from datetime import datetime
+
+import glue_metadata_config
+
+# orjson and msgspec are optional, the stdlib json module is used when neither is installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# zstandard is only needed to write .zst outputs
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+NDJSON_EXTENSIONS = ('.ndjson', '.ndjson.gz', '.ndjson.zst', '.jsonl', '.jsonl.gz', '.jsonl.zst')
+
+
+# Checks whether an output file name asks for newline-delimited JSON instead of a single JSON document
+def is_ndjson_output(output_file):
+    return output_file.endswith(NDJSON_EXTENSIONS)
+
+
+def serialize_datetime(obj):
+    """
+    Helper function to serialize datetime objects for the stdlib json module, orjson and msgspec encode them natively.
+
+    Parameters:
+        obj (Any): The object to be serialized.
+
+    Returns:
+        str: A JSON-compatible representation of the datetime object.
+
+    Raises:
+        TypeError: If the provided object is not an instance of the datetime class.
+    """
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError("Object of type '{}' is not JSON serializable".format(type(obj)))
+
+
+def dumps_json(obj, pretty=False):
+    """Serialize with the stdlib json module, indenting by 4 spaces when pretty."""
+    if pretty:
+        return json.dumps(obj, indent=4, default=serialize_datetime).encode()
+    return json.dumps(obj, separators=(',', ':'), default=serialize_datetime).encode()
+
+
+def dumps_orjson(obj, pretty=False):
+    """Serialize with orjson, or with the stdlib json module when pretty, as orjson only indents by 2 spaces."""
+    if pretty:
+        return dumps_json(obj, pretty)
+    return orjson.dumps(obj)
+
+
+def dumps_msgspec(obj, pretty=False):
+    """Serialize with msgspec, or with the stdlib json module when pretty, so pretty files do not vary by backend."""
+    if pretty:
+        return dumps_json(obj, pretty)
+    return msgspec.json.encode(obj)
+
+
+# The serializer backends by name, fastest first
+SERIALIZERS = {
+    'orjson': dumps_orjson,
+    'msgspec': dumps_msgspec,
+    'json': dumps_json
+}
+
+SERIALIZER_MODULES = {
+    'orjson': orjson,
+    'msgspec': msgspec,
+    'json': json
+}
+
+
+def get_serializer(backend=None):
+    """
+    Return the function serializing an object to JSON bytes.
+
+    Parameters:
+        backend (str, optional): 'orjson', 'msgspec', 'json' or 'auto' for the fastest installed library.
+            Default is glue_metadata_config.SERIALIZER.
+
+    Returns:
+        function: The serializer, called with the object and a pretty flag.
+    """
+    backend = backend or glue_metadata_config.SERIALIZER
+    if backend == 'auto':
+        backend = next(name for name, module in SERIALIZER_MODULES.items() if module is not None)
+    if backend not in SERIALIZERS:
+        raise ValueError(f"Unknown serializer '{backend}', expected one of {sorted(SERIALIZERS)} or 'auto'")
+    if SERIALIZER_MODULES[backend] is None:
+        raise ImportError(f"{backend} is required for the '{backend}' serializer")
+    return SERIALIZERS[backend]
+
+
+def write_json(obj, output_file, pretty=None, backend=None):
+    """
+    Write an object to a JSON file with the configured serializer.
+
+    Parameters:
+        obj: The object to write, datetime values are written in ISO 8601 format.
+        output_file (str): The name of the output JSON file.
+        pretty (bool, optional): Indent the output. Default is glue_metadata_config.PRETTY_OUTPUT.
+        backend (str, optional): The serializer backend, see get_serializer.
+
+    Returns:
+        None
+    """
+    if pretty is None:
+        pretty = glue_metadata_config.PRETTY_OUTPUT
+    with open(output_file, 'wb') as f:
+        f.write(get_serializer(backend)(obj, pretty))
+
+
+class NdjsonWriter:
+    """
+    Streaming writer emitting one JSON record per line, optionally compressed.
+
+    Records are written as they arrive, so memory stays flat whatever the number of records, and the output is
+    flushed every `flush_every` records so downstream tools can read it before the crawl finishes. The compression
+    is chosen from the file extension: '.gz' for gzip and '.zst' for zstd.
+    """
+
+    def __init__(self, output_file, append=False, flush_every=100, backend=None):
+        """
+        Parameters:
+            output_file (str): The name of the output file.
+            append (bool, optional): Append to an existing file instead of replacing it. Compressed outputs get a
+                new gzip member or zstd frame, which readers decompress as one stream.
+            flush_every (int, optional): The number of records between two flushes. Default is 100.
+            backend (str, optional): The serializer backend, see get_serializer.
+        """
+        self.output_file = output_file
+        self.flush_every = flush_every
+        self.records = 0
+        self._dumps = get_serializer(backend)
+        self._file = open(output_file, 'ab' if append else 'wb')
+        if output_file.endswith('.gz'):
+            self._stream = gzip.GzipFile(fileobj=self._file, mode='wb')
+        elif output_file.endswith('.zst'):
+            if zstandard is None:
+                raise ImportError("zstandard is required to write .zst outputs")
+            self._stream = zstandard.ZstdCompressor().stream_writer(self._file, closefd=False)
+        else:
+            self._stream = self._file
+
+    def write(self, record):
+        """Write one record as a line of JSON."""
+        self._stream.write(self._dumps(record) + b'\n')
+        self.records += 1
+        if self.records % self.flush_every == 0:
+            self.flush()
+
+    def flush(self):
+        """Flush the written records, including a complete compressed block, to the file."""
+        if isinstance(self._stream, gzip.GzipFile):
+            self._stream.flush()
+        elif self._stream is not self._file:
+            self._stream.flush(zstandard.FLUSH_BLOCK)
+        self._file.flush()
+
+    def close(self):
+        if self._stream is not self._file:
+            self._stream.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,629 @@
+import logging
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import glue_metadata_config
+from glue_metadata_cache import get_range_cache
+from glue_metadata_s3 import is_data_file, list_objects_parallel, parse_s3_location
+
+logger = logging.getLogger(__name__)
+
+# A Parquet file ends with the 4-byte little-endian length of its footer and the magic bytes
+PARQUET_MAGIC = b'PAR1'
+FOOTER_TAIL_SIZE = 8
+
+# Thrift compact protocol types
+COMPACT_BOOLEAN_TRUE = 1
+COMPACT_BOOLEAN_FALSE = 2
+COMPACT_BYTE = 3
+COMPACT_I16 = 4
+COMPACT_I32 = 5
+COMPACT_I64 = 6
+COMPACT_DOUBLE = 7
+COMPACT_BINARY = 8
+COMPACT_LIST = 9
+COMPACT_SET = 10
+COMPACT_MAP = 11
+COMPACT_STRUCT = 12
+
+# Parquet physical types
+BOOLEAN, INT32, INT64, INT96, FLOAT, DOUBLE, BYTE_ARRAY, FIXED_LEN_BYTE_ARRAY = range(8)
+
+# Parquet field repetitions
+REQUIRED, OPTIONAL, REPEATED = range(3)
+
+# Parquet converted types, the legacy annotations of the schema elements
+CONVERTED_UTF8 = 0
+CONVERTED_MAP = 1
+CONVERTED_MAP_KEY_VALUE = 2
+CONVERTED_LIST = 3
+CONVERTED_ENUM = 4
+CONVERTED_DECIMAL = 5
+CONVERTED_DATE = 6
+CONVERTED_TIMESTAMP_MILLIS = 9
+CONVERTED_TIMESTAMP_MICROS = 10
+CONVERTED_JSON = 19
+
+# Parquet logical types, the field ids of the LogicalType union
+LOGICAL_STRING = 1
+LOGICAL_MAP = 2
+LOGICAL_LIST = 3
+LOGICAL_ENUM = 4
+LOGICAL_DECIMAL = 5
+LOGICAL_DATE = 6
+LOGICAL_TIMESTAMP = 8
+LOGICAL_INTEGER = 10
+LOGICAL_JSON = 12
+
+# Hive types of the integer annotations, keyed by bit width and signedness
+INTEGER_TYPES = {
+    (8, True): 'tinyint',
+    (16, True): 'smallint',
+    (32, True): 'int',
+    (64, True): 'bigint',
+    (8, False): 'smallint',
+    (16, False): 'int',
+    (32, False): 'bigint',
+    (64, False): 'decimal(20,0)'
+}
+
+# The bit width and signedness of the legacy integer annotations, keyed by converted type
+CONVERTED_INTEGERS = {
+    11: (8, False),
+    12: (16, False),
+    13: (32, False),
+    14: (64, False),
+    15: (8, True),
+    16: (16, True),
+    17: (32, True),
+    18: (64, True)
+}
+
+# struct formats of the plain-encoded statistics values, keyed by physical type
+STATISTICS_FORMATS = {
+    BOOLEAN: '<?',
+    INT32: '<i',
+    INT64: '<q',
+    FLOAT: '<f',
+    DOUBLE: '<d'
+}
+
+
+class CompactReader:
+    """
+    Decoder of the Thrift compact protocol, the encoding of the Parquet footer.
+
+    Structs are decoded into dictionaries keyed by field id, as the footer is read without the Thrift definitions.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def read_byte(self):
+        byte = self.data[self.offset]
+        self.offset += 1
+        return byte
+
+    def read_varint(self):
+        result = 0
+        shift = 0
+        while True:
+            byte = self.read_byte()
+            result |= (byte & 0x7f) << shift
+            if not byte & 0x80:
+                return result
+            shift += 7
+
+    def read_zigzag(self):
+        value = self.read_varint()
+        return (value >> 1) ^ -(value & 1)
+
+    def read_binary(self):
+        size = self.read_varint()
+        value = bytes(self.data[self.offset:self.offset + size])
+        self.offset += size
+        return value
+
+    def read_value(self, compact_type):
+        """Read a value of the given compact type."""
+        if compact_type == COMPACT_BOOLEAN_TRUE:
+            return True
+        if compact_type == COMPACT_BOOLEAN_FALSE:
+            return False
+        if compact_type == COMPACT_BYTE:
+            return struct.unpack('<b', bytes((self.read_byte(),)))[0]
+        if compact_type in (COMPACT_I16, COMPACT_I32, COMPACT_I64):
+            return self.read_zigzag()
+        if compact_type == COMPACT_DOUBLE:
+            value = struct.unpack_from('<d', self.data, self.offset)[0]
+            self.offset += 8
+            return value
+        if compact_type == COMPACT_BINARY:
+            return self.read_binary()
+        if compact_type in (COMPACT_LIST, COMPACT_SET):
+            return self.read_list()
+        if compact_type == COMPACT_MAP:
+            return self.read_map()
+        if compact_type == COMPACT_STRUCT:
+            return self.read_struct()
+        raise ValueError(f"Unknown Thrift compact type {compact_type} at offset {self.offset}")
+
+    def read_list(self):
+        header = self.read_byte()
+        size = header >> 4
+        element_type = header & 0x0f
+        if size == 15:
+            size = self.read_varint()
+        if element_type in (COMPACT_BOOLEAN_TRUE, COMPACT_BOOLEAN_FALSE):
+            # The booleans of a list are written as one byte each
+            return [self.read_byte() == COMPACT_BOOLEAN_TRUE for _ in range(size)]
+        return [self.read_value(element_type) for _ in range(size)]
+
+    def read_map(self):
+        size = self.read_varint()
+        if not size:
+            return {}
+        types = self.read_byte()
+        return {self.read_value(types >> 4): self.read_value(types & 0x0f) for _ in range(size)}
+
+    def read_struct(self):
+        fields = {}
+        field_id = 0
+        while True:
+            header = self.read_byte()
+            if header == 0:
+                return fields
+            delta = header >> 4
+            field_id = field_id + delta if delta else self.read_zigzag()
+            fields[field_id] = self.read_value(header & 0x0f)
+
+
+# Builds the Hive type of a DECIMAL element from its logical type, or from the legacy scale and precision
+def get_decimal_type(element, logical_type):
+    decimal = logical_type.get(LOGICAL_DECIMAL)
+    if decimal is not None:
+        return f"decimal({decimal.get(2)},{decimal.get(1)})"
+    return f"decimal({element.get(8)},{element.get(7, 0)})"
+
+
+def get_primitive_type(element):
+    """
+    Map a primitive Parquet schema element to the Hive type Glue uses for it.
+
+    Parameters:
+        element (dict): A SchemaElement, keyed by Thrift field id.
+
+    Returns:
+        str: The Hive type, for example 'bigint', 'string' or 'decimal(10,2)'.
+    """
+    physical_type = element.get(1)
+    converted_type = element.get(6)
+    logical_type = element.get(10) or {}
+
+    if LOGICAL_DECIMAL in logical_type or converted_type == CONVERTED_DECIMAL:
+        return get_decimal_type(element, logical_type)
+    if physical_type == BOOLEAN:
+        return 'boolean'
+    if physical_type in (INT32, INT64):
+        if LOGICAL_DATE in logical_type or converted_type == CONVERTED_DATE:
+            return 'date'
+        if LOGICAL_TIMESTAMP in logical_type or converted_type in (CONVERTED_TIMESTAMP_MILLIS,
+                                                                    CONVERTED_TIMESTAMP_MICROS):
+            return 'timestamp'
+        if LOGICAL_INTEGER in logical_type:
+            integer = logical_type[LOGICAL_INTEGER]
+            return INTEGER_TYPES.get((integer.get(1), integer.get(2, True)), 'bigint')
+        if converted_type in CONVERTED_INTEGERS:
+            return INTEGER_TYPES[CONVERTED_INTEGERS[converted_type]]
+        return 'int' if physical_type == INT32 else 'bigint'
+    if physical_type == INT96:
+        return 'timestamp'
+    if physical_type == FLOAT:
+        return 'float'
+    if physical_type == DOUBLE:
+        return 'double'
+    if physical_type == BYTE_ARRAY and (
+            logical_type.keys() & {LOGICAL_STRING, LOGICAL_ENUM, LOGICAL_JSON}
+            or converted_type in (CONVERTED_UTF8, CONVERTED_ENUM, CONVERTED_JSON)):
+        return 'string'
+    return 'binary'
+
+
+def build_schema_tree(elements):
+    """
+    Rebuild the nested schema from the flat, depth-first list of the footer.
+
+    Parameters:
+        elements (list): The SchemaElements of the FileMetaData, the first one being the root.
+
+    Returns:
+        list: The (element, children) nodes of the top-level fields.
+    """
+    position = 1
+
+    def read_node():
+        nonlocal position
+        element = elements[position]
+        position += 1
+        return element, [read_node() for _ in range(element.get(5) or 0)]
+
+    return [read_node() for _ in range(elements[0].get(5) or 0)] if elements else []
+
+
+def get_node_type(node):
+    """Return the Hive type of a schema node, ignoring its own repetition."""
+    element, children = node
+    if element.get(5) is None:
+        return get_primitive_type(element)
+
+    converted_type = element.get(6)
+    logical_type = element.get(10) or {}
+    if (LOGICAL_LIST in logical_type or converted_type == CONVERTED_LIST) and len(children) == 1:
+        repeated_element, repeated_children = children[0]
+        name = repeated_element.get(4, b'').decode()
+        if len(repeated_children) == 1 and name != 'array' and not name.endswith('_tuple'):
+            # Three-level list: the repeated group wraps the element field
+            return f"array<{get_field_type(repeated_children[0])}>"
+        # Two-level list: the repeated field is the element
+        return f"array<{get_node_type(children[0])}>"
+    if (LOGICAL_MAP in logical_type or converted_type in (CONVERTED_MAP, CONVERTED_MAP_KEY_VALUE)) \
+            and len(children) == 1 and len(children[0][1]) == 2:
+        key, value = children[0][1]
+        return f"map<{get_field_type(key)},{get_field_type(value)}>"
+    return "struct<{}>".format(','.join(
+        f"{child[0].get(4, b'').decode()}:{get_field_type(child)}" for child in children))
+
+
+# Returns the Hive type of a schema field, a repeated field without list annotation is an array
+def get_field_type(node):
+    field_type = get_node_type(node)
+    return f"array<{field_type}>" if node[0].get(3) == REPEATED else field_type
+
+
+# Decodes a plain-encoded min or max statistic, binary values that are not UTF-8 are returned in hex
+def decode_statistic(physical_type, value):
+    if value is None:
+        return None
+    statistics_format = STATISTICS_FORMATS.get(physical_type)
+    if statistics_format is not None:
+        if len(value) != struct.calcsize(statistics_format):
+            return None
+        return struct.unpack(statistics_format, value)[0]
+    try:
+        return value.decode()
+    except UnicodeDecodeError:
+        return value.hex()
+
+
+def get_row_group_stats(row_group):
+    """
+    Summarize a RowGroup of the footer.
+
+    Parameters:
+        row_group (dict): A RowGroup, keyed by Thrift field id.
+
+    Returns:
+        dict: The 'num_rows' and 'total_byte_size' of the row group, and the 'num_values', 'null_count', 'min' and
+            'max' of every column chunk, keyed by dotted column path.
+    """
+    columns = {}
+    for column_chunk in row_group.get(1, []):
+        metadata = column_chunk.get(3)
+        if metadata is None:
+            continue
+        statistics = metadata.get(12) or {}
+        physical_type = metadata.get(1)
+        columns['.'.join(part.decode() for part in metadata.get(3, []))] = {
+            'num_values': metadata.get(5),
+            'null_count': statistics.get(3),
+            # min_value and max_value replace the legacy min and max, whose sort order was undefined
+            'min': decode_statistic(physical_type, statistics.get(6, statistics.get(2))),
+            'max': decode_statistic(physical_type, statistics.get(5, statistics.get(1)))
+        }
+    return {'num_rows': row_group.get(3), 'total_byte_size': row_group.get(2), 'columns': columns}
+
+
+def parse_footer(footer):
+    """
+    Parse the FileMetaData footer of a Parquet file.
+
+    Parameters:
+        footer (bytes): The Thrift compact encoded FileMetaData, without the length and magic bytes.
+
+    Returns:
+        dict: The 'columns' in the format of the Glue Columns, the 'num_rows', the 'created_by' and the statistics of
+            every row group in 'row_groups', see get_row_group_stats.
+    """
+    metadata = CompactReader(footer).read_struct()
+    created_by = metadata.get(6)
+    return {
+        'columns': [{'Name': node[0].get(4, b'').decode(), 'Type': get_field_type(node)}
+                    for node in build_schema_tree(metadata.get(2, []))],
+        'num_rows': metadata.get(3),
+        'created_by': created_by.decode() if created_by is not None else None,
+        'row_groups': [get_row_group_stats(row_group) for row_group in metadata.get(4, [])]
+    }
+
+
+def get_object_range(s3_client, bucket, key, byte_range, etag=None, range_cache=None):
+    """
+    Read a byte range of an S3 object with a ranged GET, or from the range cache.
+
+    A range is looked up in the cache only when the ETag is known, as it identifies the version of the object. Read
+    ranges are always cached under the ETag of the response.
+
+    Parameters:
+        s3_client: Boto3 S3 client.
+        bucket (str): The name of the bucket.
+        key (str): The key of the object.
+        byte_range (str): The HTTP range, for example 'bytes=-8' for the last 8 bytes.
+        etag (str, optional): Fail instead of reading another version of the object.
+        range_cache (RangeCache, optional): The range cache. Default is the shared cache when
+            glue_metadata_config.RANGE_CACHE_ENABLED is set.
+
+    Returns:
+        tuple: The bytes read, a memoryview on a cache hit, the ETag of the object and its size.
+    """
+    range_cache = range_cache or get_range_cache()
+    if range_cache is not None and etag:
+        cached = range_cache.get(bucket, key, etag, byte_range)
+        if cached is not None:
+            data, object_size = cached
+            return data, etag, object_size
+
+    kwargs = {'IfMatch': etag} if etag else {}
+    response = s3_client.get_object(Bucket=bucket, Key=key, Range=byte_range, **kwargs)
+    data = response['Body'].read()
+    object_size = int(response['ContentRange'].rsplit('/', 1)[1])
+    if range_cache is not None:
+        range_cache.put(bucket, key, response['ETag'], byte_range, data, object_size)
+    return data, response['ETag'], object_size
+
+
+def read_footer(s3_client, bucket, key, etag=None, tail_size=None):
+    """
+    Read the footer of a Parquet object with two ranged GETs, never downloading the data pages.
+
+    The first GET reads the tail holding the footer length and the magic bytes, the second reads the footer. When
+    the tail is large enough to hold the footer, the second GET is skipped.
+
+    Parameters:
+        s3_client: Boto3 S3 client.
+        bucket (str): The name of the bucket.
+        key (str): The key of the object.
+        etag (str, optional): The ETag of the listed object, both GETs fail if the object was replaced.
+        tail_size (int, optional): The bytes of the first GET, at least 8.
+            Default is glue_metadata_config.PARQUET_FOOTER_TAIL_BYTES.
+
+    Returns:
+        tuple: The footer bytes, a memoryview when read from the range cache, and the ETag of the object.
+    """
+    tail_size = max(FOOTER_TAIL_SIZE, tail_size or glue_metadata_config.PARQUET_FOOTER_TAIL_BYTES)
+    tail, etag, object_size = get_object_range(s3_client, bucket, key, f'bytes=-{tail_size}', etag)
+    if len(tail) < FOOTER_TAIL_SIZE or tail[-4:] != PARQUET_MAGIC:
+        raise ValueError(f"Not a Parquet file: 's3://{bucket}/{key}'")
+
+    footer_size = struct.unpack('<I', tail[-8:-4])[0]
+    if footer_size + FOOTER_TAIL_SIZE > object_size:
+        raise ValueError(f"Corrupt Parquet footer length {footer_size}: 's3://{bucket}/{key}'")
+    if footer_size + FOOTER_TAIL_SIZE <= len(tail):
+        return tail[-FOOTER_TAIL_SIZE - footer_size:-FOOTER_TAIL_SIZE], etag
+
+    start = object_size - FOOTER_TAIL_SIZE - footer_size
+    footer, etag, _ = get_object_range(s3_client, bucket, key, f'bytes={start}-{object_size - FOOTER_TAIL_SIZE - 1}',
+                                       etag)
+    return footer, etag
+
+
+class FooterCache:
+    """
+    In-memory LRU cache of parsed Parquet footers, keyed by bucket, key and ETag.
+
+    An object rewritten in place gets another ETag, so a cached footer is never served for changed data.
+    """
+
+    def __init__(self, max_entries=None):
+        """
+        Parameters:
+            max_entries (int, optional): The number of footers kept. Default is
+                glue_metadata_config.PARQUET_FOOTER_CACHE_SIZE.
+        """
+        self.max_entries = max_entries or glue_metadata_config.PARQUET_FOOTER_CACHE_SIZE
+        self.hits = 0
+        self.misses = 0
+        self._footers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, bucket, key, etag):
+        """Return the cached footer of an object version, or None."""
+        with self._lock:
+            footer = self._footers.get((bucket, key, etag))
+            if footer is None:
+                self.misses += 1
+                return None
+            self._footers.move_to_end((bucket, key, etag))
+            self.hits += 1
+            return footer
+
+    def put(self, bucket, key, etag, footer):
+        """Cache the footer of an object version, evicting the least recently used footers."""
+        with self._lock:
+            self._footers[(bucket, key, etag)] = footer
+            self._footers.move_to_end((bucket, key, etag))
+            while len(self._footers) > self.max_entries:
+                self._footers.popitem(last=False)
+
+    def stats(self):
+        """
+        Returns:
+            dict: The number of hits, misses and cached footers.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'footers': len(self._footers)}
+
+
+# Footers shared by the schema inference of the whole run
+footer_cache = FooterCache()
+
+
+def get_parquet_footer(s3_client, bucket, key, etag=None, cache=footer_cache):
+    """
+    Return the parsed footer of a Parquet object, from the cache when its ETag is known and cached.
+
+    Parameters:
+        s3_client: Boto3 S3 client.
+        bucket (str): The name of the bucket.
+        key (str): The key of the object.
+        etag (str, optional): The ETag of the listed object.
+        cache (FooterCache, optional): The footer cache, None disables caching. Default is the shared cache.
+
+    Returns:
+        dict: The parsed footer, see parse_footer.
+    """
+    if cache is not None and etag:
+        footer = cache.get(bucket, key, etag)
+        if footer is not None:
+            return footer
+    footer_bytes, etag = read_footer(s3_client, bucket, key, etag)
+    footer = parse_footer(footer_bytes)
+    if cache is not None:
+        cache.put(bucket, key, etag, footer)
+    return footer
+
+
+def read_parquet_footers(s3_client, bucket, objects, max_workers=None, cache=footer_cache):
+    """
+    Read the footers of many Parquet objects concurrently.
+
+    Objects that cannot be read or are not Parquet files are logged and skipped.
+
+    Parameters:
+        s3_client: Boto3 S3 client, shared by all workers.
+        bucket (str): The name of the bucket.
+        objects (list): Object dictionaries as returned in the 'Contents' of list_objects_v2, the ETag is optional.
+        max_workers (int, optional): The number of footers read at the same time.
+            Default is glue_metadata_config.MAX_WORKERS.
+        cache (FooterCache, optional): The footer cache, None disables caching. Default is the shared cache.
+
+    Returns:
+        generator: (key, footer) tuples in completion order.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers or glue_metadata_config.MAX_WORKERS) as executor:
+        futures = {executor.submit(get_parquet_footer, s3_client, bucket, obj['Key'], obj.get('ETag'), cache):
+                   obj['Key'] for obj in objects}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                footer = future.result()
+            except Exception as e:
+                logger.warning("Footer of 's3://%s/%s' not read: %s", bucket, key, e)
+                continue
+            yield key, footer
+
+
+# Picks at most max_files objects spread evenly over the listed keys, so every partition has a chance to be sampled
+def sample_objects(objects, max_files):
+    if len(objects) <= max_files:
+        return list(objects)
+    return [objects[index * len(objects) // max_files] for index in range(max_files)]
+
+
+def merge_columns(footers):
+    """
+    Merge the columns of several footers into one schema.
+
+    Parameters:
+        footers (iterable): Parsed footers, see parse_footer.
+
+    Returns:
+        tuple: The columns in order of first appearance with the type first seen, and the types seen for every
+            column read with more than one type.
+    """
+    types = {}
+    for footer in footers:
+        for column in footer['columns']:
+            types.setdefault(column['Name'], []).append(column['Type'])
+    columns = [{'Name': name, 'Type': column_types[0]} for name, column_types in types.items()]
+    conflicts = {name: sorted(set(column_types)) for name, column_types in types.items()
+                 if len(set(column_types)) > 1}
+    return columns, conflicts
+
+
+def infer_schema(s3_client, bucket, objects, max_workers=None, cache=footer_cache):
+    """
+    Infer the schema of Parquet objects from their footers.
+
+    Parameters:
+        s3_client: Boto3 S3 client.
+        bucket (str): The name of the bucket.
+        objects (list): The objects to read, see read_parquet_footers.
+        max_workers (int, optional): The number of footers read at the same time.
+        cache (FooterCache, optional): The footer cache, None disables caching. Default is the shared cache.
+
+    Returns:
+        dict: The merged 'columns', the 'type_conflicts' between files, the 'files' read and their 'num_rows'.
+    """
+    footers = dict(read_parquet_footers(s3_client, bucket, objects, max_workers, cache))
+    columns, conflicts = merge_columns(footers[key] for key in sorted(footers))
+    return {
+        'columns': columns,
+        'type_conflicts': conflicts,
+        'files': len(footers),
+        'num_rows': sum(footer['num_rows'] or 0 for footer in footers.values())
+    }
+
+
+def infer_location_schema(s3_client, location, max_files=None, max_workers=None, cache=footer_cache):
+    """
+    Infer the schema of the Parquet files under an S3 location from the footers of a sample of them.
+
+    Parameters:
+        s3_client: Boto3 S3 client.
+        location (str): The 's3://bucket/prefix/' location, for example a table location.
+        max_files (int, optional): The number of files sampled. Default is glue_metadata_config.PARQUET_SAMPLE_FILES.
+        max_workers (int, optional): The number of footers read at the same time.
+        cache (FooterCache, optional): The footer cache, None disables caching. Default is the shared cache.
+
+    Returns:
+        dict: The inferred schema, see infer_schema, and the 'location'.
+    """
+    bucket, prefix = parse_s3_location(location)
+    objects = [obj for obj in list_objects_parallel(s3_client, location) if is_data_file(obj['Key'], prefix)]
+    sample = sample_objects(objects, max_files or glue_metadata_config.PARQUET_SAMPLE_FILES)
+    return dict(infer_schema(s3_client, bucket, sample, max_workers, cache), location=location)
+
+
+# Normalizes a Hive type for comparison, Glue accepts spaces and char and varchar for string columns
+def normalize_type(column_type):
+    column_type = ''.join(column_type.lower().split())
+    if column_type.startswith(('varchar', 'char')):
+        return 'string'
+    return 'int' if column_type == 'integer' else column_type
+
+
+def compare_columns(glue_columns, data_columns):
+    """
+    Compare the columns of a Glue table with the columns inferred from its data. Names are compared ignoring case,
+    as Glue stores them in lower case.
+
+    Parameters:
+        glue_columns (list): The Columns of the table.
+        data_columns (list): The inferred columns, see infer_schema.
+
+    Returns:
+        dict: The columns 'missing_in_glue', the columns 'missing_in_data' and the 'type_mismatches', each with the
+            Glue and the data type.
+    """
+    glue_types = {column['Name'].lower(): column.get('Type', '') for column in glue_columns}
+    data_types = {column['Name'].lower(): column['Type'] for column in data_columns}
+    return {
+        'missing_in_glue': [{'Name': name, 'Type': data_types[name]} for name in data_types if name not in glue_types],
+        'missing_in_data': [{'Name': name, 'Type': glue_types[name]} for name in glue_types if name not in data_types],
+        'type_mismatches': [{'Name': name, 'GlueType': glue_types[name], 'DataType': data_types[name]}
+                            for name in glue_types
+                            if name in data_types and normalize_type(glue_types[name]) != normalize_type(
+                                data_types[name])]
+    }
@@ -0,0 +1,278 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import glue_metadata_config
+
+logger = logging.getLogger(__name__)
+
+# Glue splits a partition scan into at most 10 segments
+MAX_PARTITION_SEGMENTS = 10
+
+# The maximum number of entries of one batch_update_partition call
+BATCH_UPDATE_PARTITION_MAX_ENTRIES = 100
+
+# The keys of the Glue PartitionInput shape
+PARTITION_INPUT_KEYS = ('Values', 'LastAccessTime', 'StorageDescriptor', 'Parameters', 'LastAnalyzedTime')
+
+
+# Splits the Glue connection pool, MAX_WORKERS connections, between the partition scans of concurrent workers
+def get_worker_segments(max_workers):
+    return max(1, min(glue_metadata_config.PARTITION_SEGMENTS, glue_metadata_config.MAX_WORKERS // max(1, max_workers)))
+
+
+# Puts an item on a bounded queue, waiting for room unless the consumer stopped iterating
+def put_unless_stopped(items, item, stop):
+    while not stop.is_set():
+        try:
+            items.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+class SegmentMetrics:
+    """
+    Throughput of one segment of a partition scan.
+    """
+
+    def __init__(self, segment_number):
+        self.segment_number = segment_number
+        self.pages = 0
+        self.partitions = 0
+        self.started = None
+        self.finished = None
+
+    def seconds(self):
+        """Return the seconds the segment has been scanning, up to its end."""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: The segment number, the pages and partitions read, the elapsed seconds and the partitions per second.
+        """
+        seconds = self.seconds()
+        return {
+            'segment': self.segment_number,
+            'pages': self.pages,
+            'partitions': self.partitions,
+            'seconds': round(seconds, 3),
+            'partitions_per_second': round(self.partitions / seconds, 1) if seconds else 0.0
+        }
+
+
+class PartitionScan:
+    """
+    Parallel scan of the partitions of a table with get_partitions.
+
+    The scan is split into Glue segments, each paginated by its own worker thread. Iterating over the scan yields the
+    partitions as the pages arrive, in no particular order. At most `max_queued_pages` pages wait for the caller, so
+    a slow caller slows the workers down instead of filling the memory. Stopping the iteration stops the workers.
+    """
+
+    def __init__(self, glue_client, database_name, table_name, catalog_id=None, expression=None,
+                 exclude_column_schema=False, total_segments=None, max_queued_pages=None):
+        """
+        Parameters:
+            glue_client: Boto3 Glue client, shared by all segments.
+            database_name (str): The name of the database where the table resides.
+            table_name (str): The name of the table.
+            catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+            expression (str, optional): A server-side filter on the partition keys, for example "dt >= '2024-01-01'".
+            exclude_column_schema (bool, optional): Leave the columns out of the partition descriptors, when the
+                caller does not need them.
+            total_segments (int, optional): The number of parallel segments, at most 10.
+                Default is glue_metadata_config.PARTITION_SEGMENTS.
+            max_queued_pages (int, optional): The number of pages waiting for the caller. Default is twice the
+                number of segments.
+        """
+        self.glue_client = glue_client
+        self.database_name = database_name
+        self.table_name = table_name
+        self.catalog_id = catalog_id
+        self.expression = expression
+        self.exclude_column_schema = exclude_column_schema
+        self.total_segments = max(1, min(total_segments or glue_metadata_config.PARTITION_SEGMENTS,
+                                         MAX_PARTITION_SEGMENTS))
+        self.max_queued_pages = max_queued_pages or 2 * self.total_segments
+        self.segments = [SegmentMetrics(segment_number) for segment_number in range(self.total_segments)]
+        self.started = None
+        self.finished = None
+
+    def __iter__(self):
+        pages = queue.Queue(self.max_queued_pages)
+        stop = threading.Event()
+        self.started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.total_segments) as executor:
+            for metrics in self.segments:
+                executor.submit(self._scan_segment, metrics, pages, stop)
+            try:
+                remaining = self.total_segments
+                while remaining:
+                    page = pages.get()
+                    if page is None:
+                        remaining -= 1
+                    elif isinstance(page, Exception):
+                        raise page
+                    else:
+                        yield from page
+            finally:
+                stop.set()
+        self.finished = time.monotonic()
+        logger.info("Partition scan of '%s.%s': %s", self.database_name, self.table_name, self.stats())
+
+    def stats(self):
+        """
+        Returns:
+            dict: The partitions read, the elapsed seconds and partitions per second of the scan, and the metrics
+                of every segment.
+        """
+        seconds = ((self.finished or time.monotonic()) - self.started) if self.started is not None else 0.0
+        partitions = sum(metrics.partitions for metrics in self.segments)
+        return {
+            'partitions': partitions,
+            'seconds': round(seconds, 3),
+            'partitions_per_second': round(partitions / seconds, 1) if seconds else 0.0,
+            'segments': [metrics.as_dict() for metrics in self.segments]
+        }
+
+    def _get_partitions_kwargs(self, segment_number):
+        kwargs = dict(DatabaseName=self.database_name, TableName=self.table_name)
+        if self.catalog_id:
+            kwargs['CatalogId'] = self.catalog_id
+        if self.total_segments > 1:
+            kwargs['Segment'] = {'SegmentNumber': segment_number, 'TotalSegments': self.total_segments}
+        if self.expression:
+            kwargs['Expression'] = self.expression
+        if self.exclude_column_schema:
+            kwargs['ExcludeColumnSchema'] = True
+        return kwargs
+
+    def _scan_segment(self, metrics, pages, stop):
+        metrics.started = time.monotonic()
+        try:
+            paginator = self.glue_client.get_paginator('get_partitions')
+            for page in paginator.paginate(**self._get_partitions_kwargs(metrics.segment_number)):
+                metrics.pages += 1
+                metrics.partitions += len(page['Partitions'])
+                if not put_unless_stopped(pages, page['Partitions'], stop):
+                    return
+            metrics.finished = time.monotonic()
+            put_unless_stopped(pages, None, stop)
+        except Exception as e:
+            metrics.finished = time.monotonic()
+            put_unless_stopped(pages, e, stop)
+
+
+def get_table_partitions(glue_client, database_name, table_name, catalog_id=None, expression=None,
+                         exclude_column_schema=False, total_segments=None):
+    """
+    Yield every partition of a table, scanning the Glue segments in parallel. See PartitionScan.
+
+    Parameters:
+        glue_client: Boto3 Glue client.
+        database_name (str): The name of the database where the table resides.
+        table_name (str): The name of the table.
+        catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+        expression (str, optional): A server-side filter on the partition keys.
+        exclude_column_schema (bool, optional): Leave the columns out of the partition descriptors.
+        total_segments (int, optional): The number of parallel segments, at most 10.
+
+    Returns:
+        generator: Partition dictionaries as returned in the 'Partitions' of get_partitions.
+    """
+    return iter(PartitionScan(glue_client, database_name, table_name, catalog_id, expression, exclude_column_schema,
+                              total_segments))
+
+
+# Builds the PartitionInput of a partition with updated columns, keeping every other attribute it accepts
+def build_partition_input(partition, columns):
+    partition_input = {key: partition[key] for key in PARTITION_INPUT_KEYS if key in partition}
+    partition_input['StorageDescriptor'] = dict(partition['StorageDescriptor'], Columns=columns)
+    return partition_input
+
+
+def get_partition_column_updates(partition, comments):
+    """
+    Apply the table column comments to the columns of a partition.
+
+    Parameters:
+        partition (dict): A partition as returned by get_partitions.
+        comments (dict): The non-empty column comments of the table, keyed by column name.
+
+    Returns:
+        list: The updated columns of the partition, or None when its columns already match.
+    """
+    columns = partition.get('StorageDescriptor', {}).get('Columns')
+    if not columns:
+        return None
+    changed = False
+    updated_columns = []
+    for column in columns:
+        comment = comments.get(column['Name'])
+        if comment and column.get('Comment', '') != comment:
+            column = dict(column, Comment=comment)
+            changed = True
+        updated_columns.append(column)
+    return updated_columns if changed else None
+
+
+def propagate_column_comments(glue_client, database_name, table_name, columns, catalog_id=None,
+                              total_segments=None):
+    """
+    Copy the column comments of a table to the columns of all its partitions with batch_update_partition.
+
+    The partitions are read with a parallel PartitionScan and updated 100 per call. Partitions whose columns already
+    carry the comments are skipped.
+
+    Parameters:
+        glue_client: Boto3 Glue client.
+        database_name (str): The name of the database where the table resides.
+        table_name (str): The name of the table.
+        columns (list): The columns of the table, with their comments.
+        catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+        total_segments (int, optional): The number of parallel segments of the partition scan.
+
+    Returns:
+        dict: The number of 'updated', 'unchanged' and 'failed' partitions.
+    """
+    report = {'updated': 0, 'unchanged': 0, 'failed': 0}
+    comments = {column['Name']: column['Comment'] for column in columns if column.get('Comment')}
+    if not comments:
+        return report
+
+    catalog_id_kwargs = {'CatalogId': catalog_id} if catalog_id else {}
+    entries = []
+
+    def update_partitions():
+        response = glue_client.batch_update_partition(DatabaseName=database_name, TableName=table_name,
+                                                      Entries=entries, **catalog_id_kwargs)
+        for error in response.get('Errors', []):
+            logger.warning("Partition %s of '%s.%s' not updated: %s", error.get('PartitionValueList'),
+                           database_name, table_name, error.get('ErrorDetail'))
+        report['failed'] += len(response.get('Errors', []))
+        report['updated'] += len(entries) - len(response.get('Errors', []))
+        entries.clear()
+
+    for partition in PartitionScan(glue_client, database_name, table_name, catalog_id,
+                                   total_segments=total_segments):
+        updated_columns = get_partition_column_updates(partition, comments)
+        if updated_columns is None:
+            report['unchanged'] += 1
+            continue
+        entries.append({'PartitionValueList': partition['Values'],
+                        'PartitionInput': build_partition_input(partition, updated_columns)})
+        if len(entries) == BATCH_UPDATE_PARTITION_MAX_ENTRIES:
+            update_partitions()
+    if entries:
+        update_partitions()
+
+    logger.info("Partitions of '%s.%s': %d updated, %d unchanged and %d failed", database_name, table_name,
+                report['updated'], report['unchanged'], report['failed'])
+    return report
@@ -0,0 +1,214 @@
+import asyncio
+import threading
+import time
+
+import glue_metadata_config
+
+# Error codes AWS services return when a caller is throttled
+THROTTLING_ERROR_CODES = {
+    'ThrottlingException',
+    'Throttling',
+    'TooManyRequestsException',
+    'RequestLimitExceeded',
+    'RequestThrottled',
+    'RequestThrottledException',
+    'SlowDown',
+    'ProvisionedThroughputExceededException'
+}
+
+
+class AdaptiveTokenBucket:
+    """
+    Token bucket whose rate adapts with AIMD (additive increase, multiplicative decrease).
+
+    Every successful request raises the rate by about `additive_increase` requests per second per second of traffic,
+    every throttled request multiplies the rate by `decrease_factor`. The bucket holds at most one second of tokens.
+    """
+
+    def __init__(self, rate, min_rate=1.0, max_rate=100.0, additive_increase=1.0, decrease_factor=0.5):
+        """
+        Parameters:
+            rate (float): The initial rate in requests per second.
+            min_rate (float, optional): The lowest rate a throttled bucket falls to.
+            max_rate (float, optional): The highest rate a successful bucket grows to.
+            additive_increase (float, optional): The rate increase per second of successful requests.
+            decrease_factor (float, optional): The factor the rate is multiplied by on throttling.
+        """
+        self.rate = float(rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.additive_increase = additive_increase
+        self.decrease_factor = decrease_factor
+        self.tokens = 1.0
+        self.last_refill = time.monotonic()
+        self.requests = 0
+        self.throttles = 0
+        self.wait_seconds = 0.0
+        self.last_wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token, going into debt when the bucket is empty.
+
+        Returns:
+            float: The seconds the caller must wait before sending its request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(max(self.rate, 1.0), self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            self.tokens -= 1.0
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.requests += 1
+            self.wait_seconds += wait
+            self.last_wait_seconds = wait
+            return wait
+
+    def acquire(self):
+        """Block until the caller may send its request and return the seconds waited."""
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until the caller may send its request, return the seconds waited."""
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+    def on_success(self):
+        """Raise the rate additively after a successful request."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.additive_increase / self.rate)
+
+    def on_throttle(self):
+        """Lower the rate multiplicatively after a throttled request."""
+        with self._lock:
+            self.throttles += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+
+    def stats(self):
+        """
+        Returns:
+            dict: The current rate, the total and last wait time and the request and throttle counts.
+        """
+        with self._lock:
+            return {
+                'rate': round(self.rate, 3),
+                'wait_seconds': round(self.wait_seconds, 3),
+                'last_wait_seconds': round(self.last_wait_seconds, 3),
+                'requests': self.requests,
+                'throttles': self.throttles
+            }
+
+
+class RateLimiter:
+    """
+    Client-side rate limiter with one adaptive token bucket per API operation, for example 'GetTables'.
+
+    The limiter hooks into botocore client events: a token is taken before every call and the outcome of every
+    attempt, including botocore's own retries, adapts the rate of the operation.
+    """
+
+    def __init__(self, rates=None, default_rate=None, max_rate=None, services=None):
+        """
+        Parameters:
+            rates (dict, optional): The initial rate of API operations, keyed by operation name.
+                Default is glue_metadata_config.RATE_LIMITS.
+            default_rate (float, optional): The initial rate of the other operations.
+                Default is glue_metadata_config.RATE_LIMIT_DEFAULT.
+            max_rate (float, optional): The highest rate of every operation.
+                Default is glue_metadata_config.RATE_LIMIT_MAX.
+            services (list, optional): The services whose clients are rate limited, clients of other services are
+                left alone. Default is glue_metadata_config.RATE_LIMITED_SERVICES.
+        """
+        self.rates = glue_metadata_config.RATE_LIMITS if rates is None else rates
+        self.default_rate = default_rate or glue_metadata_config.RATE_LIMIT_DEFAULT
+        self.max_rate = max_rate or glue_metadata_config.RATE_LIMIT_MAX
+        self.services = glue_metadata_config.RATE_LIMITED_SERVICES if services is None else services
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, operation_name):
+        """Return the token bucket of the API operation, creating it on first use."""
+        bucket = self._buckets.get(operation_name)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(operation_name)
+                if bucket is None:
+                    rate = self.rates.get(operation_name, self.default_rate)
+                    bucket = AdaptiveTokenBucket(rate, max_rate=max(rate, self.max_rate))
+                    self._buckets[operation_name] = bucket
+        return bucket
+
+    def is_limited(self, client):
+        """Check whether the service of a client is rate limited, for example 'glue'."""
+        return client.meta.service_model.service_name in self.services
+
+    def attach(self, client):
+        """
+        Rate limit every call of a boto3 client, unless its service is not rate limited.
+
+        Parameters:
+            client: Boto3 client.
+
+        Returns:
+            The same client.
+        """
+        if not self.is_limited(client):
+            return client
+        service_id = client.meta.service_model.service_id.hyphenize()
+        client.meta.events.register(f'before-call.{service_id}', self._before_call)
+        client.meta.events.register(f'needs-retry.{service_id}', self._needs_retry)
+        return client
+
+    def attach_async(self, client):
+        """
+        Rate limit every call of an aiobotocore client, waiting without blocking the event loop, unless its service
+        is not rate limited.
+
+        Parameters:
+            client: aiobotocore client.
+
+        Returns:
+            The same client.
+        """
+        if not self.is_limited(client):
+            return client
+        service_id = client.meta.service_model.service_id.hyphenize()
+        client.meta.events.register(f'before-call.{service_id}', self._before_call_async)
+        client.meta.events.register(f'needs-retry.{service_id}', self._needs_retry)
+        return client
+
+    def stats(self):
+        """
+        Returns:
+            dict: The metrics of every token bucket, keyed by operation name.
+        """
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {operation_name: bucket.stats() for operation_name, bucket in sorted(buckets.items())}
+
+    def _before_call(self, model, **kwargs):
+        self.bucket(model.name).acquire()
+
+    async def _before_call_async(self, model, **kwargs):
+        await self.bucket(model.name).acquire_async()
+
+    def _needs_retry(self, operation, response=None, **kwargs):
+        # Called after every attempt, response is None when the attempt failed without an HTTP response
+        if response is None:
+            return None
+        error_code = response[1].get('Error', {}).get('Code')
+        if error_code in THROTTLING_ERROR_CODES:
+            self.bucket(operation.name).on_throttle()
+        elif error_code is None:
+            self.bucket(operation.name).on_success()
+        return None
+
+
+# The rate limiter shared by every client of the process
+rate_limiter = RateLimiter()
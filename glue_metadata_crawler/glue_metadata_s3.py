@@ -0,0 +1,416 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+
+import glue_metadata_config
+from glue_metadata_partitions import PartitionScan, put_unless_stopped
+
+logger = logging.getLogger(__name__)
+
+# The maximum number of partitions of one batch_create_partition and batch_delete_partition call
+BATCH_CREATE_PARTITION_MAX_ENTRIES = 100
+BATCH_DELETE_PARTITION_MAX_ENTRIES = 25
+
+
+# Splits an 's3://bucket/prefix' location into the bucket and the prefix, the prefix ends with '/' unless empty
+def parse_s3_location(location):
+    if not location.startswith(('s3://', 's3a://', 's3n://')):
+        raise ValueError(f"Not an S3 location: '{location}'")
+    bucket, _, prefix = location.split('://', 1)[1].partition('/')
+    if prefix and not prefix.endswith('/'):
+        prefix += '/'
+    return bucket, prefix
+
+
+# Checks whether an S3 key is a data file, Hive skips hidden files such as _SUCCESS and .crc files and everything
+# under hidden directories such as _temporary/ or .hive-staging/, below the given table or partition prefix
+def is_data_file(key, prefix=''):
+    parts = (key[len(prefix):] if key.startswith(prefix) else key).split('/')
+    return bool(parts[-1]) and not any(part.startswith(('_', '.')) for part in parts)
+
+
+def list_common_prefixes(s3_client, bucket, prefix):
+    """
+    List the 'directories' directly under a prefix, using list_objects_v2 with Delimiter='/'.
+
+    Parameters:
+        s3_client: Boto3 S3 client.
+        bucket (str): The name of the bucket.
+        prefix (str): The prefix to list, ending with '/' or empty for the root of the bucket.
+
+    Returns:
+        list: The child prefixes, each ending with '/'.
+    """
+    paginator = s3_client.get_paginator('list_objects_v2')
+    return [common_prefix['Prefix']
+            for page in paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter='/')
+            for common_prefix in page.get('CommonPrefixes', [])]
+
+
+def discover_partitions(s3_client, executor, location, partition_keys):
+    """
+    Find the Hive-style 'key=value/' partition prefixes under a table location.
+
+    The prefix tree is walked level by level, one level per partition key, listing every prefix of a level in
+    parallel on the executor. Prefixes that do not match the partition key of their level are ignored.
+
+    Parameters:
+        s3_client: Boto3 S3 client, shared by all workers.
+        executor (ThreadPoolExecutor): The worker pool running the listings.
+        location (str): The 's3://bucket/prefix/' location of the table.
+        partition_keys (list): The PartitionKeys of the table.
+
+    Returns:
+        dict: The S3 location of every partition, keyed by the tuple of its partition values.
+    """
+    bucket, root = parse_s3_location(location)
+    level = [(root, ())]
+    for partition_key in partition_keys:
+        key_name = partition_key['Name'].lower()
+        futures = [(executor.submit(list_common_prefixes, s3_client, bucket, prefix), prefix, values)
+                   for prefix, values in level]
+        level = []
+        for future, prefix, values in futures:
+            for child in future.result():
+                name, separator, value = child[len(prefix):-1].partition('=')
+                if separator and name.lower() == key_name:
+                    level.append((child, values + (unquote(value),)))
+    return {values: f's3://{bucket}/{prefix}' for prefix, values in level}
+
+
+class RangeMetrics:
+    """
+    Progress of the listing of one key range.
+    """
+
+    def __init__(self, range_number, start_after, end_at):
+        self.range_number = range_number
+        self.start_after = start_after
+        self.end_at = end_at
+        self.pages = 0
+        self.keys = 0
+        self.started = None
+        self.finished = None
+
+    def seconds(self):
+        """Return the seconds the range has been listing, up to its end."""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: The range number and bounds, the pages and keys listed, the elapsed seconds and keys per second.
+        """
+        seconds = self.seconds()
+        return {
+            'range': self.range_number,
+            'start_after': self.start_after,
+            'end_at': self.end_at,
+            'pages': self.pages,
+            'keys': self.keys,
+            'seconds': round(seconds, 3),
+            'keys_per_second': round(self.keys / seconds, 1) if seconds else 0.0
+        }
+
+
+class ParallelObjectListing:
+    """
+    Parallel listing of the objects under an S3 prefix, split into key ranges.
+
+    The first page is listed normally, and a prefix that fits in it is not split. Otherwise the key space is sampled:
+    one-key list_objects_v2 probes skip from one first character to the next, level by level, to find which key
+    prefixes hold objects. Their boundaries split the remaining keys into ranges, range i holding the keys after
+    boundary i up to and including boundary i + 1. The ranges are listed concurrently, each from its StartAfter
+    boundary, and iterating over the listing yields the objects of range after range, in key order. At most
+    `max_queued_pages` pages of a range wait for the caller.
+    """
+
+    def __init__(self, s3_client, bucket, prefix='', max_workers=None, target_ranges=None, max_probes=None,
+                 max_queued_pages=4):
+        """
+        Parameters:
+            s3_client: Boto3 S3 client, shared by all workers, for example from login_to_aws_s3.
+            bucket (str): The name of the bucket.
+            prefix (str, optional): The prefix of the listed keys. Default is the whole bucket.
+            max_workers (int, optional): The number of ranges listed at the same time.
+                Default is glue_metadata_config.MAX_WORKERS.
+            target_ranges (int, optional): The number of ranges to split the keys into. Default is four times the
+                number of workers.
+            max_probes (int, optional): The most one-key probes spent on sampling. Default is 16 times the
+                number of ranges.
+            max_queued_pages (int, optional): The number of pages of a range waiting for the caller. Default is 4.
+        """
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.max_workers = max_workers or glue_metadata_config.MAX_WORKERS
+        self.target_ranges = target_ranges or 4 * self.max_workers
+        self.max_probes = max_probes or 16 * self.target_ranges
+        self.max_queued_pages = max_queued_pages
+        self.probes = 0
+        self.ranges = []
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        stop = threading.Event()
+        self.started = time.monotonic()
+        first_range = RangeMetrics(0, None, None)
+        first_range.started = self.started
+        first_page = self.s3_client.list_objects_v2(Bucket=self.bucket, Prefix=self.prefix)
+        objects = first_page.get('Contents', [])
+        first_range.pages = 1
+        first_range.keys = len(objects)
+        first_range.finished = time.monotonic()
+        self.ranges = [first_range]
+        yield from objects
+        if not first_page.get('IsTruncated'):
+            # The keys fit in one page, sampling would cost more calls than it saves
+            self.finished = time.monotonic()
+            return
+
+        first_range.end_at = objects[-1]['Key']
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            boundaries = [boundary for boundary in self.sample_boundaries(executor) if boundary > first_range.end_at]
+            lower_bounds = [first_range.end_at] + boundaries
+            upper_bounds = boundaries + [None]
+            self.ranges += [RangeMetrics(range_number, start_after, end_at)
+                            for range_number, (start_after, end_at) in enumerate(zip(lower_bounds, upper_bounds),
+                                                                                  start=1)]
+            range_pages = [queue.Queue(self.max_queued_pages) for _ in self.ranges[1:]]
+            for metrics, pages in zip(self.ranges[1:], range_pages):
+                executor.submit(self._list_range, metrics, pages, stop)
+            try:
+                # The ranges are consumed in key order, later ranges list ahead until their queue is full
+                for pages in range_pages:
+                    while True:
+                        page = pages.get()
+                        if page is None:
+                            break
+                        if isinstance(page, Exception):
+                            raise page
+                        yield from page
+            finally:
+                stop.set()
+        self.finished = time.monotonic()
+        logger.info("Listing of 's3://%s/%s': %s", self.bucket, self.prefix,
+                    {key: value for key, value in self.stats().items() if key != 'ranges'})
+
+    def sample_boundaries(self, executor):
+        """
+        Find the key prefixes holding objects, descending one character per level until there are enough of
+        them, the probes are spent, or every prefix is a whole key. Each prefix is extended independently of its
+        siblings, so a shared prefix such as 'dt=' next to a '_SUCCESS' marker does not stop the sampling. Once
+        there are prefixes for every worker, a level where no prefix branches ends it.
+
+        Parameters:
+            executor (ThreadPoolExecutor): The worker pool running the probes of a level in parallel.
+
+        Returns:
+            list: The sorted boundaries between the ranges, at most target_ranges - 1 of them.
+        """
+        frontier = [self.prefix]
+        leaves = []
+        while frontier and len(frontier) + len(leaves) < self.target_ranges and self.probes < self.max_probes:
+            levels = list(executor.map(self._child_prefixes, frontier))
+            # A prefix without children is a whole key, it stays a boundary but is not probed again
+            leaves += [parent for parent, children in zip(frontier, levels) if not children]
+            frontier = [child for children in levels for child in children]
+            if len(frontier) + len(leaves) >= self.max_workers and all(len(children) <= 1 for children in levels):
+                # Deeper levels only lengthen the prefixes, such as '/part-' under each partition
+                break
+        # The smallest prefix only bounds keys nobody lists before it, the first range starts at the prefix
+        boundaries = sorted(frontier + leaves)[1:]
+        count = max(self.target_ranges - 1, 1)
+        if len(boundaries) > count:
+            # Keep evenly spread boundaries, the last level may have split the keys into too many prefixes
+            boundaries = [boundaries[index * len(boundaries) // count] for index in range(count)]
+        return boundaries
+
+    def stats(self):
+        """
+        Returns:
+            dict: The keys listed, the elapsed seconds, keys per second and probes of the listing, and the
+                progress of every range.
+        """
+        seconds = ((self.finished or time.monotonic()) - self.started) if self.started is not None else 0.0
+        keys = sum(metrics.keys for metrics in self.ranges)
+        return {
+            'keys': keys,
+            'seconds': round(seconds, 3),
+            'keys_per_second': round(keys / seconds, 1) if seconds else 0.0,
+            'probes': self.probes,
+            'ranges': [metrics.as_dict() for metrics in self.ranges]
+        }
+
+    def _next_key(self, start_after):
+        with self._lock:
+            self.probes += 1
+        response = self.s3_client.list_objects_v2(Bucket=self.bucket, Prefix=self.prefix, StartAfter=start_after,
+                                                  MaxKeys=1)
+        contents = response.get('Contents', [])
+        return contents[0]['Key'] if contents else None
+
+    def _child_prefixes(self, parent):
+        # Skips from one next character to the following, one probe per child prefix holding keys
+        children = []
+        start_after = parent
+        while self.probes < self.max_probes:
+            key = self._next_key(start_after)
+            if key is None or not key.startswith(parent) or len(key) == len(parent):
+                break
+            child = key[:len(parent) + 1]
+            children.append(child)
+            if ord(child[-1]) == 0x10FFFF:
+                break
+            start_after = parent + chr(ord(child[-1]) + 1)
+        return children
+
+    def _list_range(self, metrics, pages, stop):
+        if stop.is_set():
+            return
+        metrics.started = time.monotonic()
+        try:
+            kwargs = dict(Bucket=self.bucket, Prefix=self.prefix)
+            if metrics.start_after is not None:
+                kwargs['StartAfter'] = metrics.start_after
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(**kwargs):
+                objects = page.get('Contents', [])
+                last_page = metrics.end_at is not None and objects and objects[-1]['Key'] > metrics.end_at
+                if last_page:
+                    objects = [obj for obj in objects if obj['Key'] <= metrics.end_at]
+                metrics.pages += 1
+                metrics.keys += len(objects)
+                if not put_unless_stopped(pages, objects, stop):
+                    return
+                if last_page:
+                    break
+            metrics.finished = time.monotonic()
+            put_unless_stopped(pages, None, stop)
+        except Exception as e:
+            metrics.finished = time.monotonic()
+            put_unless_stopped(pages, e, stop)
+
+
+# Splits the S3 connection pool, MAX_WORKERS connections, between the parallel listings of concurrent workers
+def get_worker_listing_workers(max_workers):
+    return max(1, min(glue_metadata_config.STATS_LISTING_WORKERS,
+                      glue_metadata_config.MAX_WORKERS // max(1, max_workers)))
+
+
+def list_objects_parallel(s3_client, location, max_workers=None):
+    """
+    Yield every object under an S3 location in key order, listing key ranges in parallel. See
+    ParallelObjectListing.
+
+    Parameters:
+        s3_client: Boto3 S3 client.
+        location (str): The 's3://bucket/prefix/' location to list.
+        max_workers (int, optional): The number of ranges listed at the same time.
+
+    Returns:
+        generator: Object dictionaries as returned in the 'Contents' of list_objects_v2.
+    """
+    bucket, prefix = parse_s3_location(location)
+    return iter(ParallelObjectListing(s3_client, bucket, prefix, max_workers))
+
+
+# Checks whether at least one object is stored under a location, with a single one-key listing
+def location_exists(s3_client, location):
+    bucket, prefix = parse_s3_location(location)
+    return s3_client.list_objects_v2(Bucket=bucket, Prefix=prefix, MaxKeys=1).get('KeyCount', 0) > 0
+
+
+# Builds the PartitionInput of a discovered partition from the StorageDescriptor of its table
+def build_discovered_partition_input(table, values, location):
+    storage_descriptor = dict(table['StorageDescriptor'], Location=location)
+    storage_descriptor.pop('SchemaReference', None)
+    return {'Values': list(values), 'StorageDescriptor': storage_descriptor}
+
+
+def sync_table_partitions(glue_client, s3_client, executor, database_name, table, catalog_id=None,
+                          delete_vanished=False, total_segments=None):
+    """
+    Register the partitions found in S3 under a table location and remove the ones that vanished.
+
+    New partitions are created with batch_create_partition, 100 per call, with the StorageDescriptor of the table.
+    Optionally, registered partitions under the table location that were not discovered and whose own Location
+    no longer holds any object are deleted with batch_delete_partition, 25 per call. Partitions registered outside
+    the table location are left alone.
+
+    Parameters:
+        glue_client: Boto3 Glue client.
+        s3_client: Boto3 S3 client.
+        executor (ThreadPoolExecutor): The worker pool running the S3 listings.
+        database_name (str): The name of the database where the table resides.
+        table (dict): The table, as returned by get_table.
+        catalog_id (str, optional): The ID of the Data Catalog, defaults to the account catalog.
+        delete_vanished (bool, optional): Delete the partitions whose prefix no longer holds any object.
+            Default is False.
+        total_segments (int, optional): The number of parallel segments of the partition scan, see
+            get_worker_segments when tables are synced concurrently.
+
+    Returns:
+        dict: The number of 'discovered', 'created', 'deleted' and 'failed' partitions.
+    """
+    report = {'discovered': 0, 'created': 0, 'deleted': 0, 'failed': 0}
+    location = table.get('StorageDescriptor', {}).get('Location', '')
+    if not table.get('PartitionKeys') or not location.startswith('s3'):
+        return report
+
+    discovered = discover_partitions(s3_client, executor, location, table['PartitionKeys'])
+    report['discovered'] = len(discovered)
+
+    registered = set()
+    unmatched = {}
+    for partition in PartitionScan(glue_client, database_name, table['Name'], catalog_id,
+                                   exclude_column_schema=True, total_segments=total_segments):
+        values = tuple(partition['Values'])
+        if values in registered:
+            continue
+        registered.add(values)
+        partition_location = partition.get('StorageDescriptor', {}).get('Location', '')
+        if values not in discovered and partition_location.rstrip('/').startswith(location.rstrip('/') + '/'):
+            unmatched[values] = partition_location
+
+    # Partitions outside the Hive layout, for example added by hand, are only vanished when their prefix is empty
+    vanished = []
+    if delete_vanished:
+        futures = {values: executor.submit(location_exists, s3_client, partition_location)
+                   for values, partition_location in unmatched.items()}
+        vanished = [values for values, future in futures.items() if not future.result()]
+
+    catalog_id_kwargs = {'CatalogId': catalog_id} if catalog_id else {}
+
+    def count_errors(response, action):
+        for error in response.get('Errors', []):
+            logger.warning("Partition %s of '%s.%s' not %s: %s", error.get('PartitionValues'), database_name,
+                           table['Name'], action, error.get('ErrorDetail'))
+        report['failed'] += len(response.get('Errors', []))
+        return len(response.get('Errors', []))
+
+    new_partitions = [build_discovered_partition_input(table, values, partition_location)
+                      for values, partition_location in discovered.items() if values not in registered]
+    for start in range(0, len(new_partitions), BATCH_CREATE_PARTITION_MAX_ENTRIES):
+        batch = new_partitions[start:start + BATCH_CREATE_PARTITION_MAX_ENTRIES]
+        response = glue_client.batch_create_partition(DatabaseName=database_name, TableName=table['Name'],
+                                                      PartitionInputList=batch, **catalog_id_kwargs)
+        report['created'] += len(batch) - count_errors(response, 'created')
+
+    if delete_vanished:
+        for start in range(0, len(vanished), BATCH_DELETE_PARTITION_MAX_ENTRIES):
+            batch = vanished[start:start + BATCH_DELETE_PARTITION_MAX_ENTRIES]
+            response = glue_client.batch_delete_partition(
+                DatabaseName=database_name, TableName=table['Name'],
+                PartitionsToDelete=[{'Values': list(values)} for values in batch], **catalog_id_kwargs)
+            report['deleted'] += len(batch) - count_errors(response, 'deleted')
+
+    logger.info("Partitions of '%s.%s': %s", database_name, table['Name'], report)
+    return report
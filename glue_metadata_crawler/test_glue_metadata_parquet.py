@@ -0,0 +1,173 @@
+import struct
+
+from glue_metadata_parquet import parse_footer
+
+# Thrift compact types
+BINARY = 8
+I32 = 5
+I64 = 6
+LIST = 9
+STRUCT = 12
+
+# Parquet physical types, repetitions and converted types
+INT32, INT64, INT96, DOUBLE, BYTE_ARRAY, FIXED_LEN_BYTE_ARRAY = 1, 2, 3, 5, 6, 7
+REQUIRED, OPTIONAL, REPEATED = 0, 1, 2
+UTF8, MAP, LIST_ANNOTATION, DECIMAL = 0, 1, 3, 5
+
+
+def encode_varint(value):
+    data = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if not value:
+            data.append(byte)
+            return bytes(data)
+        data.append(byte | 0x80)
+
+
+def encode_zigzag(value):
+    return encode_varint((value << 1) ^ (value >> 63))
+
+
+def encode_value(compact_type, value):
+    if compact_type in (I32, I64):
+        return encode_zigzag(value)
+    if compact_type == BINARY:
+        value = value.encode() if isinstance(value, str) else value
+        return encode_varint(len(value)) + value
+    if compact_type == LIST:
+        element_type, items = value
+        header = bytes([len(items) << 4 | element_type]) if len(items) < 15 else \
+            bytes([0xf0 | element_type]) + encode_varint(len(items))
+        return header + b''.join(encode_value(element_type, item) for item in items)
+    return encode_struct(value)
+
+
+# Encodes a struct given as {field_id: (compact_type, value)}, with short field headers when the delta allows
+def encode_struct(fields):
+    data = bytearray()
+    last_field_id = 0
+    for field_id in sorted(fields):
+        compact_type, value = fields[field_id]
+        delta = field_id - last_field_id
+        if 0 < delta <= 15:
+            data.append(delta << 4 | compact_type)
+        else:
+            data.append(compact_type)
+            data += encode_zigzag(field_id)
+        data += encode_value(compact_type, value)
+        last_field_id = field_id
+    data.append(0)
+    return bytes(data)
+
+
+def element(name, physical_type=None, repetition=OPTIONAL, children=None, converted_type=None, logical_type=None,
+            scale=None, precision=None):
+    fields = {3: (I32, repetition), 4: (BINARY, name)}
+    if physical_type is not None:
+        fields[1] = (I32, physical_type)
+    if children is not None:
+        fields[5] = (I32, children)
+    if converted_type is not None:
+        fields[6] = (I32, converted_type)
+    if scale is not None:
+        fields[7] = (I32, scale)
+        fields[8] = (I32, precision)
+    if logical_type is not None:
+        fields[10] = (STRUCT, logical_type)
+    return fields
+
+
+def column_chunk(path, physical_type, num_values, statistics):
+    return {
+        2: (I64, 4),
+        3: (STRUCT, {
+            1: (I32, physical_type),
+            2: (LIST, (I32, [0] * 16)),
+            3: (LIST, (BINARY, path)),
+            4: (I32, 1),
+            5: (I64, num_values),
+            6: (I64, 100),
+            7: (I64, 80),
+            9: (I64, 4),
+            12: (STRUCT, statistics)
+        })
+    }
+
+
+def build_footer():
+    schema = [
+        element('schema', repetition=REQUIRED, children=11),
+        element('id', INT64, REQUIRED),
+        element('name', BYTE_ARRAY, converted_type=UTF8),
+        element('day', INT32, logical_type={6: (STRUCT, {})}),
+        element('ts', INT96),
+        element('score', DOUBLE),
+        element('price', FIXED_LEN_BYTE_ARRAY, logical_type={5: (STRUCT, {1: (I32, 2), 2: (I32, 10)})}),
+        element('legacy_price', FIXED_LEN_BYTE_ARRAY, converted_type=DECIMAL, scale=3, precision=12),
+        # Three-level list
+        element('tags', children=1, converted_type=LIST_ANNOTATION),
+        element('list', repetition=REPEATED, children=1),
+        element('element', BYTE_ARRAY, converted_type=UTF8),
+        # Two-level list
+        element('codes', children=1, converted_type=LIST_ANNOTATION),
+        element('array', INT32, REPEATED),
+        element('attributes', children=1, converted_type=MAP),
+        element('key_value', repetition=REPEATED, children=2),
+        element('key', BYTE_ARRAY, REQUIRED, converted_type=UTF8),
+        element('value', INT64),
+        element('points', INT32, REPEATED)
+    ]
+    row_group = {
+        1: (LIST, (STRUCT, [
+            column_chunk(['id'], INT64, 3, {3: (I64, 0), 5: (BINARY, struct.pack('<q', 42)),
+                                            6: (BINARY, struct.pack('<q', -7))}),
+            # Legacy max and min fields
+            column_chunk(['name'], BYTE_ARRAY, 3, {1: (BINARY, 'zoe'), 2: (BINARY, 'ann'), 3: (I64, 1)}),
+            column_chunk(['tags', 'list', 'element'], BYTE_ARRAY, 5, {})
+        ])),
+        2: (I64, 240),
+        3: (I64, 3)
+    }
+    return encode_struct({
+        1: (I32, 1),
+        2: (LIST, (STRUCT, schema)),
+        3: (I64, 3),
+        4: (LIST, (STRUCT, [row_group])),
+        6: (BINARY, 'parquet-mr version 1.12.3')
+    })
+
+
+def test_parse_footer_maps_the_schema_to_glue_columns():
+    footer = parse_footer(build_footer())
+
+    assert footer['columns'] == [
+        {'Name': 'id', 'Type': 'bigint'},
+        {'Name': 'name', 'Type': 'string'},
+        {'Name': 'day', 'Type': 'date'},
+        {'Name': 'ts', 'Type': 'timestamp'},
+        {'Name': 'score', 'Type': 'double'},
+        {'Name': 'price', 'Type': 'decimal(10,2)'},
+        {'Name': 'legacy_price', 'Type': 'decimal(12,3)'},
+        {'Name': 'tags', 'Type': 'array<string>'},
+        {'Name': 'codes', 'Type': 'array<int>'},
+        {'Name': 'attributes', 'Type': 'map<string,bigint>'},
+        {'Name': 'points', 'Type': 'array<int>'}
+    ]
+    assert footer['num_rows'] == 3
+    assert footer['created_by'] == 'parquet-mr version 1.12.3'
+
+
+def test_parse_footer_decodes_the_row_group_statistics():
+    row_groups = parse_footer(build_footer())['row_groups']
+
+    assert row_groups == [{
+        'num_rows': 3,
+        'total_byte_size': 240,
+        'columns': {
+            'id': {'num_values': 3, 'null_count': 0, 'min': -7, 'max': 42},
+            'name': {'num_values': 3, 'null_count': 1, 'min': 'ann', 'max': 'zoe'},
+            'tags.list.element': {'num_values': 5, 'null_count': None, 'min': None, 'max': None}
+        }
+    }]
@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from glue_metadata_s3 import ParallelObjectListing, is_data_file, sync_table_partitions
+
+TABLE_LOCATION = 's3://bkt/t/'
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    with mock_aws():
+        glue_client = boto3.client('glue', region_name='us-east-1')
+        s3_client = boto3.client('s3', region_name='us-east-1')
+        s3_client.create_bucket(Bucket='bkt')
+        glue_client.create_database(DatabaseInput={'Name': 'db'})
+        glue_client.create_table(DatabaseName='db', TableInput={
+            'Name': 't',
+            'PartitionKeys': [{'Name': 'dt', 'Type': 'string'}],
+            'StorageDescriptor': {'Columns': [{'Name': 'id', 'Type': 'int'}], 'Location': TABLE_LOCATION}
+        })
+        yield glue_client, s3_client
+
+
+def register_partition(glue_client, value, location):
+    glue_client.create_partition(DatabaseName='db', TableName='t', PartitionInput={
+        'Values': [value], 'StorageDescriptor': {'Columns': [{'Name': 'id', 'Type': 'int'}], 'Location': location}})
+
+
+def sync(glue_client, s3_client, delete_vanished):
+    table = glue_client.get_table(DatabaseName='db', Name='t')['Table']
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        return sync_table_partitions(glue_client, s3_client, executor, 'db', table, delete_vanished=delete_vanished)
+
+
+def partition_values(glue_client):
+    return sorted(partition['Values'][0]
+                  for partition in glue_client.get_partitions(DatabaseName='db', TableName='t')['Partitions'])
+
+
+def test_sync_keeps_non_hive_partitions_with_data(clients):
+    glue_client, s3_client = clients
+    s3_client.put_object(Bucket='bkt', Key='t/dt=1/part-0.parquet', Body=b'data')
+    s3_client.put_object(Bucket='bkt', Key='t/legacy/part-0.parquet', Body=b'data')
+    register_partition(glue_client, 'legacy', 's3://bkt/t/legacy/')
+    register_partition(glue_client, '2', 's3://bkt/t/dt=2/')
+
+    report = sync(glue_client, s3_client, delete_vanished=True)
+
+    assert report['created'] == 1
+    assert report['deleted'] == 1
+    assert partition_values(glue_client) == ['1', 'legacy']
+
+
+def test_sync_without_delete_vanished_keeps_partitions(clients):
+    glue_client, s3_client = clients
+    register_partition(glue_client, '2', 's3://bkt/t/dt=2/')
+
+    report = sync(glue_client, s3_client, delete_vanished=False)
+
+    assert report['deleted'] == 0
+    assert partition_values(glue_client) == ['2']
+
+
+@pytest.mark.parametrize('key, expected', [
+    ('_w/t/dt=1/part-0.parquet', True),
+    ('_w/t/dt=1/_SUCCESS', False),
+    ('_w/t/dt=1/', False),
+    ('_w/t/_temporary/0/part-0.parquet', False),
+    ('_w/t/dt=1/.hive-staging_1/part-0.parquet', False),
+])
+def test_is_data_file_skips_hidden_parts_below_the_prefix(key, expected):
+    assert is_data_file(key, '_w/t/') is expected
+
+
+def test_listing_splits_partitions_next_to_a_success_marker(clients):
+    _, s3_client = clients
+    keys = ['t/_SUCCESS'] + [f't/dt=2024-01-{day:02d}/part-{part:03d}.parquet'
+                             for day in range(1, 21) for part in range(100)]
+    for key in keys:
+        s3_client.put_object(Bucket='bkt', Key=key, Body=b'')
+
+    listing = ParallelObjectListing(s3_client, 'bkt', 't/', max_workers=4)
+
+    assert [obj['Key'] for obj in listing] == sorted(keys)
+    assert len(listing.ranges) > 2